@@ -8,26 +8,22 @@ bl_info = {
 }
 
 from typing import Set
+import os
+
 import bpy
 from bpy.types import Context
+from bpy_extras.io_utils import ExportHelper
 
 from . import addon_updater_ops
+from . import live_qa
+from . import panel_state
+from . import part_operators
+from . import report_view
 from . import shopar_qa
 from . import shopar_creation
 from . import utils
 
 
-def operator_execute(self, context: Context) -> Set[int] | Set[str]:
-    root = utils.get_object_root(context.active_object)
-    original_name = root.name
-    root.name = "Model"
-    result = shopar_creation.place_in_hierarchy(
-        context.active_object, self.part, context=context, report=self.report
-    )
-    root.name = original_name
-    return result
-
-
 class ShopAR_Panel(bpy.types.Panel):
     bl_label = f"ShopAR Blender tools v" + ".".join(map(str, bl_info["version"]))
     bl_idname = "OBJECT_PT_shopar"
@@ -36,7 +32,6 @@ class ShopAR_Panel(bpy.types.Panel):
     bl_category = "ShopAR QA"
 
     def draw(self, context: Context):
-        addon_updater_ops.check_for_update_background()
         addon_updater_ops.update_notice_box_ui(self, context)
         return
 
@@ -56,28 +51,31 @@ class ShopAR_Creation_Panel(bpy.types.Panel):
 
     def draw(self, context):
         layout = self.layout
+        layout.prop(context.scene, "shopar_category")
+        state = panel_state.panel_state(context.scene)
         # Move temples to screws button
-        if (
-            "temple_left" in context.scene.objects  # type: ignore
-            and "screw_left" in context.scene.objects  # type: ignore
-            and "temple_right" in context.scene.objects  # type: ignore
-            and "screw_right" in context.scene.objects  # type: ignore
-        ):
+        if state.move_temples:
             layout.operator("object.move_temples")
             layout.separator()
-        if "temple_left" in context.scene.objects: # type: ignore
-            layout.operator('object.mirror_left_to_right')
-        if "temple_right" in context.scene.objects: # type: ignore
-            layout.operator('object.mirror_right_to_left')
-
+        for operator in state.mirror_operators:
+            layout.operator(operator)
 
         if context.active_object is not None:
-            for item in utils.mesh_name_items:
-                if item[0] is None:
-                    layout.label(text=item[1])
+            if shopar_qa.scene_spec(context.scene).prototypes:
+                layout.operator("object.propose_part_names")
+            layout.operator("object.assemble_hierarchy")
+            layout.operator("object.decimate_to_budget")
+            layout.separator()
+            rows = part_operators.button_rows(context.scene.shopar_category)
+            if rows is None:
+                layout.label(text="Loading part tools...")
+                return
+            for operator, label in rows:
+                if operator is None:
+                    layout.label(text=label)
                 else:
-                    layout.operator(operator=f"object.{item[0]}")
-            
+                    layout.operator(operator=operator)
+
 
 class ShopAR_QA_Panel(bpy.types.Panel):
     bl_label = f"ShopAR QA tools"
@@ -96,25 +94,14 @@ class ShopAR_QA_Panel(bpy.types.Panel):
         layout = self.layout
 
         # Temples rotation
-        if (
-            "temple_left" in context.scene.objects  # type: ignore
-            and "temple_right" in context.scene.objects  # type: ignore
-        ):
+        state = panel_state.panel_state(context.scene)
+        if state.temple_rotation:
             layout.label(text="Test temple rotation (quaternion mode)")
-            if context.scene.objects["temple_left"].rotation_mode == "QUATERNION":
-                layout.prop(
-                    context.scene.objects["temple_left"],
-                    "rotation_quaternion",
-                    index=3,
-                    text="Left temple rotation",
-                )
-            if context.scene.objects["temple_right"].rotation_mode == "QUATERNION":
-                layout.prop(
-                    context.scene.objects["temple_right"],
-                    "rotation_quaternion",
-                    index=3,
-                    text="Right temple rotation",
-                )
+            for name, text in state.temple_rotations:
+                # The state may predate a rename until its message arrives
+                obj = context.scene.objects.get(name)
+                if obj is not None:
+                    layout.prop(obj, "rotation_quaternion", index=3, text=text)
 
         # QA glasses
         if len(context.selected_objects) == 0:  # type: ignore
@@ -124,12 +111,41 @@ class ShopAR_QA_Panel(bpy.types.Panel):
 
         layout.separator()
         layout.label(text="QA Glasses for ShopAR:")
+        layout.prop(context.scene, "shopar_category")
+        if shopar_qa.scene_spec(context.scene).budgets:
+            layout.prop(context.scene, "shopar_product_line")
+        layout.prop(context.scene, "shopar_device_tier")
         layout.operator("object.qa_glasses")
+        layout.prop(context.window_manager, "shopar_live_qa")
         if OBJECT_OT_QAGlassesOperator.QA_report:
 
-            utils.print_report(self, context, OBJECT_OT_QAGlassesOperator.QA_report)
+            report_view.draw_report(layout, context)
             if len(OBJECT_OT_QAGlassesOperator.QA_report["ERROR"]) > 0:
                 layout.operator("object.copy_report")
+            layout.operator("object.export_report")
+
+
+class ShopAR_QA_Rules_Panel(bpy.types.Panel):
+    bl_label = f"QA rules"
+    bl_idname = "OBJECT_PT_shopar_qa_rules"
+    bl_space_type = "VIEW_3D"
+    bl_region_type = "UI"
+    bl_category = "ShopAR QA"
+    bl_options = {"DEFAULT_CLOSED"}
+    bl_parent_id = "OBJECT_PT_shopar_qa"
+
+    def draw(self, context):
+        layout = self.layout
+        report = OBJECT_OT_QAGlassesOperator.QA_report
+        timings = {t["rule"]: t for t in report.timings} if report else {}
+        for rule_id in shopar_qa.RULES:
+            row = layout.row()
+            row.prop(context.scene.shopar_rules, rule_id)
+            if rule_id in timings:
+                timing = timings[rule_id]
+                row.label(
+                    text=f"{timing['seconds'] * 1000:.1f} ms, {timing['items']} items"
+                )
 
 
 class OBJECT_OT_MoveTemplesOperator(bpy.types.Operator):
@@ -148,18 +164,154 @@ class OBJECT_OT_MoveTemplesOperator(bpy.types.Operator):
             return {"CANCELLED"}
 
 
+class OBJECT_OT_AssembleHierarchyOperator(bpy.types.Operator):
+    bl_idname = "object.assemble_hierarchy"
+    bl_label = "Assemble Hierarchy From Names"
+    bl_description = "Place all selected objects named after ShopAR parts in the hierarchy at once, under the root of the active object."
+    bl_options = {"REGISTER", "UNDO"}
+
+    def execute(self, context: Context) -> Set[int] | Set[str]:
+        if context.active_object is None:
+            self.report({"ERROR"}, "No active object selected")
+            return {"CANCELLED"}
+        spec = shopar_qa.scene_spec(context.scene)
+        placed = shopar_creation.assemble_hierarchy(
+            context.selected_objects,
+            context,
+            root=shopar_creation.assembly_root(context.active_object, spec),
+            report=self.report,
+            spec=spec,
+        )
+        if placed == 0:
+            self.report({"WARNING"}, "No selected object is named after a part")
+            return {"CANCELLED"}
+        self.report({"INFO"}, f"Placed {placed} parts in the hierarchy")
+        return {"FINISHED"}
+
+
+def proposal_part_items(self, context: Context) -> list:
+    return shopar_creation.part_items(context.scene.shopar_category)
+
+
+class ShopAR_PartProposal(bpy.types.PropertyGroup):
+    object_name = bpy.props.StringProperty(name="Object")
+    part = bpy.props.EnumProperty(name="Part", items=proposal_part_items)
+    apply = bpy.props.BoolProperty(name="Apply", default=True)
+
+
+class OBJECT_OT_ProposePartNamesOperator(bpy.types.Operator):
+    bl_idname = "object.propose_part_names"
+    bl_label = "Propose Part Names"
+    bl_description = "Guess the ShopAR part of every selected mesh from its size and position, confirm and place them all in the hierarchy at once."
+    bl_options = {"REGISTER", "UNDO"}
+
+    proposals = bpy.props.CollectionProperty(type=ShopAR_PartProposal)
+
+    def invoke(self, context: Context, event) -> Set[int] | Set[str]:
+        self.proposals.clear()
+        spec = shopar_qa.scene_spec(context.scene)
+        if not spec.prototypes:
+            self.report({"WARNING"}, f"The {spec.category} spec has no part prototypes")
+            return {"CANCELLED"}
+        for obj, part in shopar_creation.propose_part_names(
+            context.selected_objects, spec
+        ):
+            item = self.proposals.add()
+            item.object_name = obj.name
+            item.part = part
+        if len(self.proposals) == 0:
+            self.report({"WARNING"}, "No part could be proposed for the selection")
+            return {"CANCELLED"}
+        return context.window_manager.invoke_props_dialog(self, width=400)
+
+    def draw(self, context: Context):
+        for item in self.proposals:
+            row = self.layout.row()
+            row.prop(item, "apply", text=item.object_name)
+            row.prop(item, "part", text="")
+
+    def execute(self, context: Context) -> Set[int] | Set[str]:
+        assignments = [
+            (bpy.data.objects[item.object_name], item.part)
+            for item in self.proposals
+            if item.apply and item.object_name in bpy.data.objects
+        ]
+        if not assignments or context.active_object is None:
+            return {"CANCELLED"}
+        spec = shopar_qa.scene_spec(context.scene)
+        root = shopar_creation.assembly_root(context.active_object, spec)
+        if root in {obj for obj, _ in assignments}:
+            root = None
+        result = shopar_creation.build_hierarchy(
+            assignments, context, root=root, report=self.report, spec=spec
+        )
+        if result == {"FINISHED"}:
+            self.report({"INFO"}, f"Placed {len(assignments)} parts in the hierarchy")
+        return result
+
+
+class OBJECT_OT_DecimateToBudgetOperator(bpy.types.Operator):
+    bl_idname = "object.decimate_to_budget"
+    bl_label = "Decimate to Triangle Budget"
+    bl_description = "Decimate the parts of the model to fit a triangle budget. The protected parts of the category spec are kept as they are."
+    bl_options = {"REGISTER", "UNDO"}
+
+    target = bpy.props.IntProperty(
+        name="Triangles",
+        description="Triangle budget of the whole model",
+        default=100_000,
+        min=1,
+    )
+
+    def invoke(self, context: Context, event) -> Set[int] | Set[str]:
+        self.target = shopar_qa.scene_budget(context.scene).get("total", self.target)
+        return context.window_manager.invoke_props_dialog(self)
+
+    def execute(self, context: Context) -> Set[int] | Set[str]:
+        if context.active_object is None:
+            return {"CANCELLED"}
+        root = utils.get_object_root(context.active_object)
+        try:
+            before, after = shopar_creation.decimate_to_budget(
+                context,
+                root,
+                self.target,
+                jobs=os.cpu_count() or 1,
+                spec=shopar_qa.scene_spec(context.scene),
+            )
+        except RuntimeError as e:
+            self.report({"ERROR"}, str(e))
+            return {"CANCELLED"}
+        level = "INFO" if after <= self.target else "WARNING"
+        self.report({level}, f"Triangles {before} -> {after}, budget {self.target}")
+        return {"FINISHED"}
+
+
 class OBJECT_OT_QAGlassesOperator(bpy.types.Operator):
     bl_idname = "object.qa_glasses"
     bl_label = "QA Glasses model"
     bl_description = "QA Glasses for ShopAR"
     QA_report: dict = {}
+    # Per-object results of previous runs, see shopar_qa.check_faces
+    QA_cache: dict = {}
+
+    incremental = bpy.props.BoolProperty(
+        name="Incremental",
+        description="Re-check only objects changed since the last run",
+        default=True,
+    )
 
     def execute(self, context: Context) -> Set[int] | Set[str]:
         if len(context.selected_objects) == 0:  # type: ignore
             return {"CANCELLED"}
+        if not self.incremental:
+            self.__class__.QA_cache.clear()
         QA_report = {}
-        QA_report = shopar_qa.check_model(context=context)
+        QA_report = shopar_qa.check_model(
+            context=context, cache=self.__class__.QA_cache
+        )
         self.__class__.QA_report = QA_report
+        report_view.set_report(context.window_manager, QA_report)
         self.report({"INFO"}, "Finished automatic QA")
         return {"FINISHED"}
 
@@ -171,25 +323,74 @@ class OBJECT_OT_CopyReportOperator(bpy.types.Operator):
 
     def execute(self, context: bpy.types.Context) -> Set[int] | Set[str]:
         text = "\n\n".join(
-            [item for item in OBJECT_OT_QAGlassesOperator.QA_report["ERROR"]]
+            finding.message + (f"\nFix: {finding.fix}" if finding.fix else "")
+            for finding in OBJECT_OT_QAGlassesOperator.QA_report.findings
+            if finding.severity == "ERROR"
         )
         utils.copy_to_clipboard(text)
         return {"FINISHED"}
 
+
+class OBJECT_OT_ExportReportOperator(bpy.types.Operator, ExportHelper):
+    bl_idname = "object.export_report"
+    bl_label = "Export report"
+    bl_description = "Save the QA report as JSON or JUnit XML"
+
+    filename_ext = ".json"
+    filter_glob = bpy.props.StringProperty(default="*.json;*.xml", options={"HIDDEN"})
+    format = bpy.props.EnumProperty(
+        name="Format",
+        items=[
+            ("JSON", "JSON", "Findings with rule, node, value, threshold and fix"),
+            ("JUNIT", "JUnit XML", "One test case per finding, errors fail"),
+        ],
+    )
+
+    def execute(self, context: bpy.types.Context) -> Set[int] | Set[str]:
+        report = OBJECT_OT_QAGlassesOperator.QA_report
+        if not report:
+            return {"CANCELLED"}
+        filepath = self.filepath
+        if self.format == "JSON":
+            text = report.to_json()
+        else:
+            text = report.to_junit(report.root or context.scene.name)
+            filepath = os.path.splitext(filepath)[0] + ".xml"
+        with open(filepath, "w") as file:
+            file.write(text)
+        self.report({"INFO"}, f"Saved report to {filepath}")
+        return {"FINISHED"}
+
 class OBJECT_OT_MirrorGlassesRightToLeft(bpy.types.Operator):
     bl_idname = "object.mirror_right_to_left"
     bl_label = "Mirror Right Temple To Left"
     bl_description = "Mirror right temple of glasses to the right. Components must be named after the ShopAR specification."
+    bl_options = {"REGISTER", "UNDO"}
+
+    share_data = bpy.props.BoolProperty(
+        name="Share mesh data",
+        description="Parts sharing a mesh share its mirrored copy",
+        default=True,
+    )
+
     def execute(self, context: Context) -> Set[int] | Set[str]:
-        shopar_creation.mirrorRightToLeft(context=context)
+        shopar_creation.mirrorRightToLeft(context=context, share_data=self.share_data)
         return {"FINISHED"}
 
 class OBJECT_OT_MirrorGlassesLeftToRight(bpy.types.Operator):
     bl_idname = "object.mirror_left_to_right"
     bl_label = "Mirror Left Temple to Right"
     bl_description = "Mirror left components of glasses to right. Components must be named after the ShopAR specification."
+    bl_options = {"REGISTER", "UNDO"}
+
+    share_data = bpy.props.BoolProperty(
+        name="Share mesh data",
+        description="Parts sharing a mesh share its mirrored copy",
+        default=True,
+    )
+
     def execute(self, context: Context) -> Set[int] | Set[str]:
-        shopar_creation.mirrorLeftToRight(context=context)
+        shopar_creation.mirrorLeftToRight(context=context, share_data=self.share_data)
         return {"FINISHED"}
     
 
@@ -245,9 +446,15 @@ classes = [
     ShopAR_Panel,
     ShopAR_Creation_Panel,
     ShopAR_QA_Panel,
+    ShopAR_QA_Rules_Panel,
     OBJECT_OT_QAGlassesOperator,
     OBJECT_OT_CopyReportOperator,
+    OBJECT_OT_ExportReportOperator,
     OBJECT_OT_MoveTemplesOperator,
+    OBJECT_OT_AssembleHierarchyOperator,
+    ShopAR_PartProposal,
+    OBJECT_OT_ProposePartNamesOperator,
+    OBJECT_OT_DecimateToBudgetOperator,
     ShopAR_QA_Preferences,
     OBJECT_OT_MirrorGlassesLeftToRight,
     OBJECT_OT_MirrorGlassesRightToLeft,
@@ -256,28 +463,29 @@ classes = [
 
 def register():
     addon_updater_ops.register(bl_info)
-    for item in utils.mesh_name_items:
-        if item[0] is None:
-            continue
-        new_class = type(
-            f"{item}Operator",
-            (bpy.types.Operator,),
-            {
-                "bl_idname": f"object.{item[0]}",
-                "bl_label": item[1],
-                "part": item[0],
-                # data members
-                "execute": operator_execute,
-            },
-        )
-        if new_class not in classes:
-            classes.append(new_class)
     for cls in classes:
         addon_updater_ops.make_annotations(cls)  # Avoid blender 2.8 warnings.
         bpy.utils.register_class(cls)
+    shopar_qa.register()
+    report_view.register()
+    live_qa.register(OBJECT_OT_QAGlassesOperator)
+    panel_state.register()
+    if bpy.app.background:
+        part_operators.register_all()
+    # Once per session, outside of the panel's draw
+    bpy.app.timers.register(
+        addon_updater_ops.check_for_update_background, first_interval=1.0
+    )
 
 
 def unregister():
+    if bpy.app.timers.is_registered(addon_updater_ops.check_for_update_background):
+        bpy.app.timers.unregister(addon_updater_ops.check_for_update_background)
+    part_operators.unregister()
+    panel_state.unregister()
+    live_qa.unregister()
+    report_view.unregister()
+    shopar_qa.unregister()
     addon_updater_ops.unregister()
     for cls in reversed(classes):
         bpy.utils.unregister_class(cls)
@@ -0,0 +1,324 @@
+"""Headless QA of a directory or manifest of .blend / .glb / .gltf files.
+
+Run from Blender, arguments after "--" belong to this script:
+    blender -b --factory-startup --python batch_qa.py -- assets/ --jobs 8 --output qa.jsonl
+
+A manifest is a text file with one asset path per line. Every asset produces
+one JSON line with the report of each root object in the file. glTF files are
+read directly by qa_core instead of being imported into Blender. With --jobs N
+the assets are split over N Blender worker processes.
+"""
+import argparse
+import importlib
+import json
+import os
+import subprocess
+import sys
+import threading
+
+import bpy
+
+if __package__:
+    from . import qa_core
+    from . import shopar_qa
+    from .qa_core import budget, spec
+else:
+    ADDON_DIR = os.path.dirname(os.path.abspath(__file__))
+    sys.path.insert(0, os.path.dirname(ADDON_DIR))
+    qa_core = importlib.import_module(f"{os.path.basename(ADDON_DIR)}.qa_core")
+    shopar_qa = importlib.import_module(f"{os.path.basename(ADDON_DIR)}.shopar_qa")
+    budget = importlib.import_module(f"{os.path.basename(ADDON_DIR)}.qa_core.budget")
+    spec = importlib.import_module(f"{os.path.basename(ADDON_DIR)}.qa_core.spec")
+
+ASSET_EXTENSIONS = (".blend", ".glb", ".gltf")
+# Prefix of report lines in worker output, the rest is Blender's own logging
+WORKER_PREFIX = "SHOPAR_QA_REPORT "
+
+
+def collect_assets(source: str) -> list[str]:
+    if os.path.isdir(source):
+        assets = []
+        for directory, _, files in os.walk(source):
+            for file in files:
+                if file.lower().endswith(ASSET_EXTENSIONS):
+                    assets.append(os.path.join(directory, file))
+        return sorted(assets)
+
+    base = os.path.dirname(os.path.abspath(source))
+    with open(source) as manifest:
+        lines = [line.strip() for line in manifest]
+    return [os.path.join(base, line) for line in lines if line and line[0] != "#"]
+
+
+def model_roots(scene: bpy.types.Scene, category_spec: spec.Spec) -> list:
+    """Parentless objects of scene that are models.
+
+    Those are the roots named after the root of the spec and the roots with
+    meshes below them, cameras and lights of the file are left out.
+    """
+    with_meshes = set()
+    for obj in scene.objects:
+        if obj.type == "MESH":
+            while obj.parent is not None:
+                obj = obj.parent
+            with_meshes.add(obj)
+    return [
+        obj
+        for obj in scene.objects
+        if obj.parent is None
+        and (obj in with_meshes or obj.name.split(".")[0] == category_spec.root)
+    ]
+
+
+def check_asset(
+    path: str,
+    triangle_budget: dict,
+    render_limits: dict,
+    rule_flags: dict,
+    threads: int = 1,
+    category: str = spec.DEFAULT_CATEGORY,
+) -> dict:
+    if not path.lower().endswith(".blend"):
+        try:
+            snapshot = qa_core.load_gltf(path)
+        except Exception as e:
+            return {"file": path, "error": f"Failed to load: {e}"}
+        try:
+            report = qa_core.check_model(
+                snapshot,
+                None,
+                triangle_budget,
+                render_limits,
+                rule_flags,
+                threads,
+                spec.load_spec(category),
+            )
+        except Exception as e:
+            return {"file": path, "error": f"Failed to check: {e}"}
+        return {
+            "file": path,
+            "roots": [{"root": snapshot.names[0], "report": report.to_dict()}],
+        }
+
+    try:
+        bpy.ops.wm.open_mainfile(filepath=path)
+    except Exception as e:
+        return {"file": path, "error": f"Failed to load: {e}"}
+
+    roots = model_roots(bpy.context.scene, spec.load_spec(category))
+    if not roots:
+        return {"file": path, "error": "No model found, no object has meshes"}
+    try:
+        reports = [
+            {
+                "root": root.name,
+                "report": shopar_qa.check_object(
+                    root,
+                    None,
+                    triangle_budget,
+                    render_limits,
+                    rule_flags,
+                    threads,
+                    spec.load_spec(category),
+                ).to_dict(),
+            }
+            for root in roots
+        ]
+    except Exception as e:
+        return {"file": path, "error": f"Failed to check: {e}"}
+    return {"file": path, "roots": reports}
+
+
+def run_worker(
+    assets: list[str],
+    triangle_budget: dict,
+    render_limits: dict,
+    rule_flags: dict,
+    threads: int,
+    category: str,
+):
+    for path in assets:
+        line = json.dumps(
+            check_asset(
+                path, triangle_budget, render_limits, rule_flags, threads, category
+            )
+        )
+        print(WORKER_PREFIX + line, flush=True)
+
+
+def junit_reports(lines: list[dict]) -> list:
+    """(name, Report) of every root of the asset lines, for JUnit output."""
+    reports = []
+    for line in lines:
+        for root in line.get("roots", []):
+            name = f"{line['file']}:{root['root']}"
+            reports.append((name, qa_core.Report.from_dict(root["report"])))
+    return reports
+
+
+def run_parallel(
+    assets: list[str], jobs: int, output, budget_args: list[str], lines: list
+):
+    """Check assets in jobs worker processes.
+
+    Assets of a worker that exits with an error before reporting them get an
+    error line each, so every asset has a line in the output.
+    """
+    lock = threading.Lock()
+
+    def write(line: dict):
+        with lock:
+            output.write(json.dumps(line) + "\n")
+            output.flush()
+            lines.append(line)
+
+    def forward(process: subprocess.Popen, reported: set):
+        for line in process.stdout:
+            if line.startswith(WORKER_PREFIX):
+                line = json.loads(line[len(WORKER_PREFIX) :])
+                reported.add(line["file"])
+                write(line)
+
+    processes = []
+    slices = []
+    for worker_assets in (assets[i::jobs] for i in range(jobs)):
+        if not worker_assets:
+            continue
+        command = [
+            bpy.app.binary_path,
+            "-b",
+            "--factory-startup",
+            "--python",
+            os.path.abspath(__file__),
+            "--",
+            "--worker",
+            *budget_args,
+            *worker_assets,
+        ]
+        processes.append(
+            subprocess.Popen(command, stdout=subprocess.PIPE, text=True)
+        )
+        slices.append(worker_assets)
+
+    reported = [set() for _ in processes]
+    threads = [
+        threading.Thread(target=forward, args=(process, files))
+        for process, files in zip(processes, reported)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread, process, worker_assets, files in zip(
+        threads, processes, slices, reported
+    ):
+        thread.join()
+        if process.wait() != 0:
+            for path in worker_assets:
+                if path not in files:
+                    write(
+                        {
+                            "file": path,
+                            "error": f"Worker exited with code {process.returncode}",
+                        }
+                    )
+
+
+def main(argv: list[str]):
+    parser = argparse.ArgumentParser(prog="batch_qa.py", description=__doc__)
+    parser.add_argument("source", nargs="+", help="Directory or manifest file")
+    parser.add_argument("--jobs", type=int, default=1, help="Worker processes")
+    parser.add_argument("--output", help="JSON lines file, stdout if not given")
+    parser.add_argument(
+        "--product-line",
+        default=budget.DEFAULT_PRODUCT_LINE,
+        help="Product line of the triangle budget, one of the spec of --category",
+    )
+    parser.add_argument(
+        "--device-tier",
+        default=budget.DEFAULT_DEVICE_TIER,
+        choices=budget.RENDER_BUDGETS,
+    )
+    parser.add_argument(
+        "--category",
+        default=spec.DEFAULT_CATEGORY,
+        choices=spec.categories(),
+        help="Product category whose spec the assets follow",
+    )
+    parser.add_argument("--junit", help="Also write the reports as JUnit XML")
+    parser.add_argument(
+        "--disable",
+        action="append",
+        default=[],
+        choices=qa_core.RULES,
+        help="Skip a rule",
+    )
+    parser.add_argument(
+        "--threads",
+        type=int,
+        help="Threads running the rules of an asset, all cores over --jobs by default",
+    )
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    category_spec = spec.load_spec(args.category)
+    if category_spec.budgets and args.product_line not in category_spec.budgets:
+        parser.error(
+            f"argument --product-line: invalid choice: {args.product_line!r}"
+            f" (choose from {', '.join(category_spec.budgets)})"
+        )
+    triangle_budget = budget.triangle_budget(
+        args.product_line, args.device_tier, category_spec
+    )
+    render_limits = budget.render_budget(args.device_tier)
+    rule_flags = dict.fromkeys(args.disable, False)
+    threads = args.threads or max(1, (os.cpu_count() or 1) // args.jobs)
+
+    if args.worker:
+        run_worker(
+            args.source,
+            triangle_budget,
+            render_limits,
+            rule_flags,
+            threads,
+            args.category,
+        )
+        return
+
+    assets = []
+    for source in args.source:
+        assets.extend(collect_assets(source))
+
+    output = open(args.output, "w") if args.output else sys.stdout
+    lines = []
+    try:
+        if args.jobs > 1:
+            budget_args = [
+                f"--product-line={args.product_line}",
+                f"--device-tier={args.device_tier}",
+                f"--category={args.category}",
+                *(f"--disable={rule_id}" for rule_id in args.disable),
+                f"--threads={threads}",
+            ]
+            run_parallel(assets, args.jobs, output, budget_args, lines)
+        else:
+            for path in assets:
+                line = check_asset(
+                    path,
+                    triangle_budget,
+                    render_limits,
+                    rule_flags,
+                    threads,
+                    args.category,
+                )
+                output.write(json.dumps(line) + "\n")
+                output.flush()
+                lines.append(line)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+    if args.junit:
+        with open(args.junit, "w") as junit:
+            junit.write(qa_core.junit_xml(junit_reports(lines)))
+
+
+if __name__ == "__main__":
+    main(sys.argv[sys.argv.index("--") + 1 :] if "--" in sys.argv else [])
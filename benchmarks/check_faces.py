@@ -0,0 +1,100 @@
+"""Compare the per-polygon loop and the vectorized face statistics.
+
+Run from Blender:
+    blender -b --factory-startup --python benchmarks/check_faces.py
+"""
+import importlib
+import os
+import sys
+import time
+
+import bpy
+import numpy as np
+
+ADDON_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(ADDON_DIR))
+shopar_qa = importlib.import_module(f"{os.path.basename(ADDON_DIR)}.shopar_qa")
+
+FACE_COUNTS = [10_000, 100_000, 1_000_000]
+REPEATS = 3
+
+
+def check_faces_loop(obj) -> tuple[int, int]:
+    num_triangles_total = 0
+    num_ngons_total = 0
+
+    if obj.type == "MESH":
+        for poly in obj.data.polygons:
+            if len(poly.vertices) == 3:
+                num_triangles_total += 1
+            elif len(poly.vertices) > 3:
+                num_ngons_total += 1
+
+    for child in obj.children:
+        a, b = check_faces_loop(child)
+        num_triangles_total += a
+        num_ngons_total += b
+
+    return num_triangles_total, num_ngons_total
+
+
+def make_mesh_object(num_faces: int) -> bpy.types.Object:
+    """Mesh with every tenth face a quad and the rest triangles."""
+    loop_totals = np.full(num_faces, 3, dtype=np.int32)
+    loop_totals[::10] = 4
+    loop_starts = np.concatenate(([0], np.cumsum(loop_totals)[:-1])).astype(np.int32)
+    num_loops = int(loop_totals.sum())
+    num_vertices = num_faces + 2
+
+    mesh = bpy.data.meshes.new(f"bench_{num_faces}")
+    mesh.vertices.add(num_vertices)
+    mesh.loops.add(num_loops)
+    mesh.polygons.add(num_faces)
+    co = np.random.default_rng(0).random((num_vertices, 3), dtype=np.float32)
+    mesh.vertices.foreach_set("co", co.ravel())
+    mesh.loops.foreach_set(
+        "vertex_index", (np.arange(num_loops) % num_vertices).astype(np.int32)
+    )
+    mesh.polygons.foreach_set("loop_start", loop_starts)
+    try:
+        mesh.polygons.foreach_set("loop_total", loop_totals)
+    except AttributeError:
+        pass  # Read-only and derived from loop_start in Blender 4.0+
+    mesh.update(calc_edges=True)
+
+    obj = bpy.data.objects.new(mesh.name, mesh)
+    bpy.context.scene.collection.objects.link(obj)
+    return obj
+
+
+def check_faces_snapshot(obj) -> tuple[int, int]:
+    return shopar_qa.check_faces(shopar_qa.snapshot_object(obj))
+
+
+def best_time(function, obj) -> tuple[float, tuple[int, int]]:
+    timings = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        result = function(obj)
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def main():
+    print(f"{'faces':>10} {'loop [s]':>10} {'numpy [s]':>10} {'speedup':>8}")
+    for num_faces in FACE_COUNTS:
+        obj = make_mesh_object(num_faces)
+        loop_time, loop_result = best_time(check_faces_loop, obj)
+        numpy_time, numpy_result = best_time(check_faces_snapshot, obj)
+        assert loop_result == numpy_result, (loop_result, numpy_result)
+        print(
+            f"{num_faces:>10} {loop_time:>10.4f} {numpy_time:>10.4f}"
+            f" {loop_time / numpy_time:>7.1f}x"
+        )
+        mesh = obj.data
+        bpy.data.objects.remove(obj)
+        bpy.data.meshes.remove(mesh)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,4 @@
 rm -rf __pycache__
 cd ..
-zip -r shopar_qa.zip shopar_qa -i "*.py" "*README.md"
+zip -r shopar_qa.zip shopar_qa -i "*.py" "*.json" "*README.md" -x "shopar_qa/benchmarks/*" "shopar_qa/tests/*"
 mv shopar_qa.zip shopar_qa/build
\ No newline at end of file
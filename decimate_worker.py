@@ -0,0 +1,45 @@
+"""Background worker of shopar_creation.decimate_in_workers.
+
+    blender -b --factory-startup --python decimate_worker.py -- job.json
+
+The job names a .blend library with the source meshes, the decimation ratio
+of every mesh and the library to write the decimated meshes to, under the
+same names.
+"""
+import importlib
+import json
+import os
+import sys
+
+import bpy
+
+ADDON_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(ADDON_DIR))
+shopar_creation = importlib.import_module(
+    f"{os.path.basename(ADDON_DIR)}.shopar_creation"
+)
+
+
+def main(job_path: str):
+    with open(job_path) as job_file:
+        job = json.load(job_file)
+
+    names = [name for name, _ in job["meshes"]]
+    with bpy.data.libraries.load(job["source"]) as (data_from, data_to):
+        data_to.meshes = names
+
+    depsgraph = bpy.context.evaluated_depsgraph_get()
+    results = set()
+    for mesh, name, (_, ratio) in zip(data_to.meshes, names, job["meshes"]):
+        mesh.name = f"{name}_source"
+        obj = bpy.data.objects.new(name, mesh)
+        bpy.context.scene.collection.objects.link(obj)
+        decimated = shopar_creation.decimate_mesh(obj, ratio, depsgraph)
+        decimated.name = name
+        results.add(decimated)
+
+    bpy.data.libraries.write(job["result"], results)
+
+
+if __name__ == "__main__":
+    main(sys.argv[sys.argv.index("--") + 1])
@@ -0,0 +1,107 @@
+"""Live QA: re-run the checks of the edited model after a short pause in edits.
+
+The depsgraph handler only records which models changed. The checks run from
+a bpy.app.timers callback once no update arrived for DEBOUNCE_SECONDS, so a
+burst of edits causes a single evaluation outside of the update handler.
+"""
+import time
+
+import bpy
+from bpy.app.handlers import persistent
+
+from . import report_view
+from . import shopar_qa
+from . import utils
+
+DEBOUNCE_SECONDS = 0.5
+
+# Operator class holding QA_report and QA_cache, set in register()
+_report_owner = None
+_pending_roots: set = set()
+_last_update = 0.0
+
+
+@persistent
+def on_depsgraph_update(scene, depsgraph):
+    global _last_update
+    if not bpy.context.window_manager.shopar_live_qa:  # type: ignore
+        return
+    for update in depsgraph.updates:
+        if not isinstance(update.id, bpy.types.Object):
+            continue
+        obj = update.id.original
+        if update.is_updated_geometry:
+            _report_owner.QA_cache.pop(obj.as_pointer(), None)
+        _pending_roots.add(utils.get_object_root(obj).name)
+    if not _pending_roots:
+        return
+
+    _last_update = time.monotonic()
+    if not bpy.app.timers.is_registered(run_pending):
+        bpy.app.timers.register(run_pending, first_interval=DEBOUNCE_SECONDS)
+
+
+def run_pending():
+    remaining = _last_update + DEBOUNCE_SECONDS - time.monotonic()
+    if remaining > 0:
+        return remaining
+
+    obj = bpy.context.view_layer.objects.active
+    if obj is not None and obj.mode != "EDIT":
+        if utils.get_object_root(obj).name in _pending_roots:
+            run_check(obj)
+    _pending_roots.clear()
+    return None
+
+
+def run_check(obj: bpy.types.Object):
+    scene = bpy.context.scene
+    _report_owner.QA_report = shopar_qa.check_object(
+        obj,
+        _report_owner.QA_cache,
+        shopar_qa.scene_budget(scene),
+        shopar_qa.scene_render_budget(scene),
+        shopar_qa.scene_rule_flags(scene),
+        spec=shopar_qa.scene_spec(scene),
+    )
+    report_view.set_report(bpy.context.window_manager, _report_owner.QA_report)
+    for window in bpy.context.window_manager.windows:
+        for area in window.screen.areas:
+            if area.type == "VIEW_3D":
+                area.tag_redraw()
+
+
+def toggle(self, context: bpy.types.Context):
+    handlers = bpy.app.handlers.depsgraph_update_post
+    if self.shopar_live_qa:
+        if on_depsgraph_update not in handlers:
+            handlers.append(on_depsgraph_update)
+        if context.active_object is not None:
+            run_check(context.active_object)
+    else:
+        if on_depsgraph_update in handlers:
+            handlers.remove(on_depsgraph_update)
+        if bpy.app.timers.is_registered(run_pending):
+            bpy.app.timers.unregister(run_pending)
+        _pending_roots.clear()
+
+
+def register(report_owner):
+    global _report_owner
+    _report_owner = report_owner
+    bpy.types.WindowManager.shopar_live_qa = bpy.props.BoolProperty(
+        name="Live QA",
+        description="Re-run the QA of the edited model automatically after changes",
+        default=False,
+        update=toggle,
+    )
+
+
+def unregister():
+    handlers = bpy.app.handlers.depsgraph_update_post
+    if on_depsgraph_update in handlers:
+        handlers.remove(on_depsgraph_update)
+    if bpy.app.timers.is_registered(run_pending):
+        bpy.app.timers.unregister(run_pending)
+    _pending_roots.clear()
+    del bpy.types.WindowManager.shopar_live_qa
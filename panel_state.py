@@ -0,0 +1,114 @@
+"""Cached state of the ShopAR panels.
+
+Panels are drawn on every redraw of the sidebar. The scene lookups they depend
+on are made once into a PanelState, which is kept until a depsgraph update
+touches objects, collections or the scene, an object is renamed, or a file
+load or undo step replaces the data. Renames do not reach the depsgraph
+handlers, they are subscribed to on the message bus. The temple tools are shown for categories whose spec has
+the temple parts.
+"""
+import bpy
+from bpy.app.handlers import persistent
+
+from .qa_core.spec import load_spec
+
+TEMPLE_PARTS = ("temple_left", "temple_right", "screw_left", "screw_right")
+MIRROR_OPERATORS = [
+    ("temple_left", "object.mirror_left_to_right"),
+    ("temple_right", "object.mirror_right_to_left"),
+]
+TEMPLE_ROTATIONS = [
+    ("temple_left", "Left temple rotation"),
+    ("temple_right", "Right temple rotation"),
+]
+
+_state = None
+# Owner of the message bus subscriptions
+_owner = object()
+
+
+class PanelState:
+    """What the panels show for a scene, everything but the selection."""
+
+    def __init__(self, scene: bpy.types.Scene):
+        self.scene = scene.as_pointer()
+        self.category = scene.shopar_category
+        objects = scene.objects
+        if set(TEMPLE_PARTS) <= load_spec(self.category).parents.keys():
+            present = {name for name in TEMPLE_PARTS if name in objects}
+        else:
+            present = set()
+        self.move_temples = len(present) == len(TEMPLE_PARTS)
+        self.mirror_operators = [
+            operator for name, operator in MIRROR_OPERATORS if name in present
+        ]
+        self.temple_rotation = {"temple_left", "temple_right"} <= present
+        # Temples whose quaternion W can be edited from the panel
+        self.temple_rotations = [
+            (name, text)
+            for name, text in TEMPLE_ROTATIONS
+            if self.temple_rotation and objects[name].rotation_mode == "QUATERNION"
+        ]
+
+
+def panel_state(scene: bpy.types.Scene) -> PanelState:
+    global _state
+    if (
+        _state is None
+        or _state.scene != scene.as_pointer()
+        or _state.category != scene.shopar_category
+    ):
+        _state = PanelState(scene)
+    return _state
+
+
+def invalidate(*args):
+    global _state
+    _state = None
+
+
+@persistent
+def on_depsgraph_update(scene, depsgraph):
+    if (
+        depsgraph.id_type_updated("OBJECT")
+        or depsgraph.id_type_updated("COLLECTION")
+        or depsgraph.id_type_updated("SCENE")
+    ):
+        invalidate()
+
+
+def subscribe():
+    """Invalidate on object renames, again after loads drop subscriptions."""
+    bpy.msgbus.clear_by_owner(_owner)
+    bpy.msgbus.subscribe_rna(
+        key=(bpy.types.Object, "name"), owner=_owner, args=(), notify=invalidate
+    )
+
+
+@persistent
+def on_data_replaced(*args):
+    invalidate()
+    subscribe()
+
+
+HANDLERS = [
+    (bpy.app.handlers.depsgraph_update_post, on_depsgraph_update),
+    (bpy.app.handlers.load_post, on_data_replaced),
+    (bpy.app.handlers.undo_post, on_data_replaced),
+    (bpy.app.handlers.redo_post, on_data_replaced),
+]
+
+
+def register():
+    for handlers, handler in HANDLERS:
+        if handler not in handlers:
+            handlers.append(handler)
+    subscribe()
+
+
+def unregister():
+    for handlers, handler in HANDLERS:
+        if handler in handlers:
+            handlers.remove(handler)
+    bpy.msgbus.clear_by_owner(_owner)
+    invalidate()
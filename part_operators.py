@@ -0,0 +1,114 @@
+"""Part assignment operators, generated from the spec of a product category.
+
+Every labelled part of a spec gets an operator that renames the active object
+to the part and places it in the hierarchy. The operators of a category are
+registered the first time its panel is drawn, so add-on start-up does not
+grow with the number of categories. Classes cannot be registered while a
+panel draws, so the registration runs from a timer right after. Without UI no
+panel is ever drawn, so in background mode all operators are registered with
+the add-on and scripts can call e.g. bpy.ops.object.glasses_frame().
+"""
+import functools
+from typing import Set
+
+import bpy
+
+from . import addon_updater_ops
+from . import shopar_creation
+from . import utils
+from .qa_core.spec import categories, load_spec
+
+# Operator classes and button rows of every registered category
+_classes: dict[str, list] = {}
+_rows: dict[str, list] = {}
+# Timers of the categories whose registration is scheduled
+_pending: dict = {}
+
+
+def operator_idname(category: str, part: str) -> str:
+    return f"object.{category}_{part}"
+
+
+def operator_execute(self, context: bpy.types.Context) -> Set[int] | Set[str]:
+    spec = load_spec(self.category)
+    root = utils.get_object_root(context.active_object)
+    original_name = root.name
+    root.name = spec.root
+    result = shopar_creation.place_in_hierarchy(
+        context.active_object,
+        self.part,
+        context=context,
+        report=self.report,
+        spec=spec,
+    )
+    root.name = original_name
+    return result
+
+
+def register_category(category: str):
+    """Register the operators of category, returns None to run once as timer."""
+    _pending.pop(category, None)
+    if category in _classes:
+        return None
+    spec = load_spec(category)
+    classes = []
+    rows = []
+    for part, label in spec.button_rows():
+        if part is None:
+            rows.append((None, label))
+            continue
+        cls = type(
+            f"OBJECT_OT_{category}_{part}",
+            (bpy.types.Operator,),
+            {
+                "bl_idname": operator_idname(category, part),
+                "bl_label": label,
+                "category": category,
+                "part": part,
+                "execute": operator_execute,
+            },
+        )
+        addon_updater_ops.make_annotations(cls)
+        bpy.utils.register_class(cls)
+        classes.append(cls)
+        rows.append((cls.bl_idname, None))
+    _classes[category] = classes
+    _rows[category] = rows
+
+    for window in bpy.context.window_manager.windows:
+        for area in window.screen.areas:
+            if area.type == "VIEW_3D":
+                area.tag_redraw()
+    return None
+
+
+def register_all():
+    """Register the operators of every category right away."""
+    for category in categories():
+        register_category(category)
+
+
+def button_rows(category: str) -> list | None:
+    """Rows of the part buttons, (operator idname, None) or (None, label).
+
+    None while the operators of category are not registered yet, their
+    registration is then scheduled.
+    """
+    if category in _rows:
+        return _rows[category]
+    if category not in _pending:
+        _pending[category] = functools.partial(register_category, category)
+        bpy.app.timers.register(_pending[category], first_interval=0.0)
+    return None
+
+
+def unregister():
+    for timer in _pending.values():
+        if bpy.app.timers.is_registered(timer):
+            bpy.app.timers.unregister(timer)
+    for classes in _classes.values():
+        for cls in reversed(classes):
+            bpy.utils.unregister_class(cls)
+    _classes.clear()
+    _rows.clear()
+    _pending.clear()
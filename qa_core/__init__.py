@@ -0,0 +1,12 @@
+"""ShopAR QA checks that run without Blender.
+
+The checks operate on a ModelSnapshot, a plain description of the model
+hierarchy with NumPy mesh arrays. shopar_qa fills it from Blender objects and
+qa_core.gltf from glTF files, e.g. on upload servers:
+    python -m qa_core model.glb
+"""
+from .checks import check_model
+from .gltf import load_gltf
+from .model import MeshData, ModelSnapshot
+from .report import Finding, Report, junit_xml
+from .rules import RULES, rule
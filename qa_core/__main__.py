@@ -0,0 +1,87 @@
+"""Check glTF files without Blender, one JSON line per file."""
+import argparse
+import json
+import os
+import sys
+
+from . import budget
+from .checks import check_model
+from .gltf import load_gltf
+from .report import junit_xml
+from .rules import RULES
+from .spec import DEFAULT_CATEGORY, categories, load_spec
+
+
+def main(argv: list[str]):
+    parser = argparse.ArgumentParser(prog="python -m qa_core", description=__doc__)
+    parser.add_argument("files", nargs="+", help=".glb or .gltf files")
+    parser.add_argument(
+        "--product-line",
+        default=budget.DEFAULT_PRODUCT_LINE,
+        help="Product line of the triangle budget, one of the spec of --category",
+    )
+    parser.add_argument(
+        "--device-tier",
+        default=budget.DEFAULT_DEVICE_TIER,
+        choices=budget.RENDER_BUDGETS,
+    )
+    parser.add_argument(
+        "--category",
+        default=DEFAULT_CATEGORY,
+        choices=categories(),
+        help="Product category whose spec the models follow",
+    )
+    parser.add_argument("--junit", help="Also write the reports as JUnit XML")
+    parser.add_argument(
+        "--disable", action="append", default=[], choices=RULES, help="Skip a rule"
+    )
+    parser.add_argument(
+        "--threads",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Threads running the rules of a file",
+    )
+    args = parser.parse_args(argv)
+    spec = load_spec(args.category)
+    if spec.budgets and args.product_line not in spec.budgets:
+        parser.error(
+            f"argument --product-line: invalid choice: {args.product_line!r}"
+            f" (choose from {', '.join(spec.budgets)})"
+        )
+    rule_flags = dict.fromkeys(args.disable, False)
+    triangle_budget = budget.triangle_budget(
+        args.product_line, args.device_tier, spec
+    )
+    render_limits = budget.render_budget(args.device_tier)
+
+    reports = []
+    for path in args.files:
+        try:
+            snapshot = load_gltf(path)
+        except Exception as e:
+            line = {"file": path, "error": f"Failed to load: {e}"}
+            print(json.dumps(line), flush=True)
+            continue
+        try:
+            report = check_model(
+                snapshot,
+                None,
+                triangle_budget,
+                render_limits,
+                rule_flags,
+                args.threads,
+                spec,
+            )
+            line = {"file": path, "report": report.to_dict()}
+            reports.append((path, report))
+        except Exception as e:
+            line = {"file": path, "error": f"Failed to check: {e}"}
+        print(json.dumps(line), flush=True)
+
+    if args.junit:
+        with open(args.junit, "w") as junit:
+            junit.write(junit_xml(reports))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
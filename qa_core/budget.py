@@ -0,0 +1,132 @@
+"""Triangle budgets per product line and target device tier.
+
+The triangle budgets of a product category are in its spec: budgets of the
+whole model, of every group and of every side. Parts of the model not named
+after a side count as "center".
+"""
+import numpy as np
+
+from .model import ModelSnapshot
+from .report import Report
+from .spec import SPEC, Spec
+
+# Runtime limits of the AR renderer on every device tier
+RENDER_BUDGETS = {
+    "high": {
+        "draw_calls": 32,
+        "materials": 12,
+        "gpu_vertices": 150_000,
+        "texture_bytes": 64 * 2**20,
+        "gpu_bytes": 96 * 2**20,
+    },
+    "mid": {
+        "draw_calls": 20,
+        "materials": 8,
+        "gpu_vertices": 90_000,
+        "texture_bytes": 32 * 2**20,
+        "gpu_bytes": 48 * 2**20,
+    },
+    "low": {
+        "draw_calls": 12,
+        "materials": 6,
+        "gpu_vertices": 45_000,
+        "texture_bytes": 16 * 2**20,
+        "gpu_bytes": 24 * 2**20,
+    },
+}
+DEFAULT_PRODUCT_LINE = "standard"
+DEFAULT_DEVICE_TIER = "high"
+SIDES = ("left", "right")
+# Number of parts named in the report as largest budget consumers
+NUM_TOP_PARTS = 5
+
+
+def triangle_budget(
+    product_line: str = DEFAULT_PRODUCT_LINE,
+    device_tier: str = DEFAULT_DEVICE_TIER,
+    spec: Spec = SPEC,
+) -> dict:
+    """Budget of spec for a product line and tier, empty if it has none."""
+    return spec.budgets.get(product_line, {}).get(device_tier, {})
+
+
+def render_budget(device_tier: str = DEFAULT_DEVICE_TIER) -> dict:
+    return RENDER_BUDGETS[device_tier]
+
+
+def node_groups(snapshot: ModelSnapshot) -> list[str | None]:
+    """Name of the group (child of the root) every node belongs to."""
+    groups = [None] * len(snapshot)
+    for index in range(1, len(snapshot)):
+        parent = snapshot.parents[index]
+        groups[index] = snapshot.names[index] if parent == 0 else groups[parent]
+    return groups
+
+
+def node_sides(snapshot: ModelSnapshot) -> list[str]:
+    """Side of every node from its own name or the nearest named ancestor."""
+    sides = ["center"] * len(snapshot)
+    for index in range(len(snapshot)):
+        tokens = snapshot.names[index].split("_")
+        side = next((side for side in SIDES if side in tokens), None)
+        if side is not None:
+            sides[index] = side
+        elif index > 0:
+            sides[index] = sides[snapshot.parents[index]]
+    return sides
+
+
+def triangle_usage(
+    snapshot: ModelSnapshot, node_triangles: np.ndarray
+) -> dict[str, dict[str, int]]:
+    """Triangle counts of the model by node, group and side."""
+    groups = node_groups(snapshot)
+    sides = node_sides(snapshot)
+    usage = {"node": {}, "group": {}, "side": {}}
+    for index in np.flatnonzero(node_triangles):
+        triangles = int(node_triangles[index])
+        usage["node"][snapshot.names[index]] = triangles
+        if groups[index] is not None:
+            usage["group"][groups[index]] = (
+                usage["group"].get(groups[index], 0) + triangles
+            )
+        usage["side"][sides[index]] = usage["side"].get(sides[index], 0) + triangles
+    return usage
+
+
+def check_budget(
+    snapshot: ModelSnapshot, node_triangles: np.ndarray, budget: dict, report: Report
+):
+    usage = triangle_usage(snapshot, node_triangles)
+    total = int(node_triangles.sum())
+    over_budget = False
+    for kind in ("group", "side"):
+        for name, triangles in usage[kind].items():
+            if name in budget and triangles > budget[name]:
+                over_budget = True
+                report.add(
+                    "ERROR",
+                    "budget",
+                    f'Triangles of {kind} "{name}" over budget: '
+                    f"{triangles} > {budget[name]}",
+                    name if kind == "group" else "",
+                    value=triangles,
+                    threshold=budget[name],
+                    fix=f"Decimate the parts of the {kind}",
+                )
+    if not over_budget:
+        report.add(
+            "PASSED", "budget", "Triangles of all groups and sides within budget"
+        )
+
+    top_parts = sorted(usage["node"].items(), key=lambda item: -item[1])
+    if top_parts:
+        report.add(
+            "INFO",
+            "budget",
+            "Largest parts: "
+            + ", ".join(
+                f"{name} {triangles} ({100 * triangles / budget['total']:.0f}%)"
+                for name, triangles in top_parts[:NUM_TOP_PARTS]
+            ),
+        )
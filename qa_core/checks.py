@@ -0,0 +1,475 @@
+"""QA rules of the ShopAR specification, independent of Blender."""
+from typing import Set
+
+import numpy as np
+
+from .budget import check_budget, render_budget, triangle_budget
+from .cost import check_render_cost
+from .dimensions import check_dimensions
+from .hygiene import check_hygiene
+from .model import ModelSnapshot
+from .report import Report
+from .rules import (
+    RuleContext,
+    cache_entry,
+    enabled_rules,
+    prune_cache,
+    rule,
+    run_rules,
+)
+from .spec import SPEC, Spec
+from .symmetry import check_symmetry
+from .uv import check_uv_layout
+
+
+def check_names(snapshot: ModelSnapshot) -> list:
+    return [message for _, message, _ in name_findings(snapshot)]
+
+
+def name_findings(
+    snapshot: ModelSnapshot, spec: Spec = SPEC
+) -> list[tuple[str, str, str]]:
+    """Node, message and suggested fix of every naming and hierarchy problem.
+
+    Children of groups that contain groups must be named exactly, nodes next to
+    parts may also be named misc_*. Nodes with invalid names are not descended
+    into.
+    """
+    output = []
+    obligatory_names_left = set(spec.obligatory)
+    names = snapshot.names
+
+    def invalidate(name, group, skipped=False):
+        fix = spec.suggest(name, group)
+        message = f'Invalid name: "{name}"' + (
+            f', did you mean "{fix}"?' if fix is not None else ""
+        )
+        if skipped:
+            message += f' Skipping the check of potential children of "{name}".'
+        suggestion = (
+            f'Rename to "{fix}"'
+            if fix is not None
+            else "Rename to one of " + ", ".join(spec.children[group])
+        )
+        output.append((name, message, suggestion))
+
+    def visit(node, group):
+        allowed = spec.allowed[group]
+        strict = allowed <= spec.groups
+        for child in snapshot.children[node]:
+            name = names[child]
+            obligatory_names_left.discard(name)
+            if name in allowed:
+                if name in spec.groups:
+                    visit(child, name)
+            elif strict:
+                invalidate(name, group, skipped=True)
+            elif not name.startswith("misc_"):
+                invalidate(name, group)
+
+    visit(0, spec.root)
+    for obligatory_name in sorted(obligatory_names_left, key=spec.index.get):
+        output.append(
+            (
+                obligatory_name,
+                f"Missing node {obligatory_name}",
+                f'Add a node named "{obligatory_name}"',
+            )
+        )
+
+    return output
+
+
+def mesh_face_counts(meshes: list) -> tuple[np.ndarray, np.ndarray]:
+    """Triangles and ngons of every mesh, each distinct mesh is read once."""
+    unique_meshes = {}
+    for mesh in meshes:
+        unique_meshes.setdefault(mesh, len(unique_meshes))
+    if not unique_meshes:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+
+    sizes = np.fromiter((mesh.num_polygons for mesh in unique_meshes), np.int64)
+    loop_totals = np.concatenate([mesh.loop_totals for mesh in unique_meshes])
+
+    mesh_index = np.repeat(np.arange(len(sizes)), sizes)
+    triangles = np.bincount(
+        mesh_index, weights=loop_totals == 3, minlength=len(sizes)
+    ).astype(np.int64)
+    ngons = np.bincount(
+        mesh_index, weights=loop_totals > 3, minlength=len(sizes)
+    ).astype(np.int64)
+    order = np.fromiter((unique_meshes[mesh] for mesh in meshes), dtype=np.int64)
+    return triangles[order], ngons[order]
+
+
+def count_faces(meshes: list) -> tuple[int, int]:
+    """Count triangles and ngons of all meshes.
+
+    A mesh listed several times is read once and counted once per occurrence.
+    """
+    triangles, ngons = mesh_face_counts(meshes)
+    return int(triangles.sum()), int(ngons.sum())
+
+
+def node_face_counts(
+    snapshot: ModelSnapshot, cache: dict | None = None
+) -> tuple[np.ndarray, np.ndarray]:
+    """Triangles and ngons of every node of the model.
+
+    With a cache, face counts are stored per object together with the
+    fingerprint of its mesh, and only objects whose fingerprint changed since
+    the previous run are read again. Entries of objects no longer in the
+    snapshot are dropped.
+    """
+    triangles = np.zeros(len(snapshot), dtype=np.int64)
+    ngons = np.zeros(len(snapshot), dtype=np.int64)
+    changed = []
+    for index, mesh in enumerate(snapshot.meshes):
+        if mesh is None:
+            continue
+        if cache is None:
+            changed.append((index, None))
+            continue
+        entry = cache_entry(cache, snapshot.keys[index], mesh.fingerprint())
+        if "faces" in entry:
+            triangles[index], ngons[index] = entry["faces"]
+        else:
+            changed.append((index, entry))
+
+    indices = [index for index, _ in changed]
+    triangles[indices], ngons[indices] = mesh_face_counts(
+        [snapshot.meshes[index] for index in indices]
+    )
+    if cache is not None:
+        prune_cache(cache, snapshot.keys)
+        for index, entry in changed:
+            if entry is not None:
+                entry["faces"] = (int(triangles[index]), int(ngons[index]))
+
+    return triangles, ngons
+
+
+def check_faces(
+    snapshot: ModelSnapshot, cache: dict | None = None
+) -> tuple[int, int]:
+    triangles, ngons = node_face_counts(snapshot, cache)
+    return int(triangles.sum()), int(ngons.sum())
+
+
+def count_materials(snapshot: ModelSnapshot, unique_materials: Set) -> int:
+    for mesh in snapshot.meshes:
+        if mesh is not None:
+            for material in mesh.materials:
+                if material is not None:
+                    unique_materials.add(material)
+
+    return len(unique_materials)
+
+
+def format_vector(vector) -> str:
+    return "(" + ", ".join(f"{value:.4f}" for value in vector) + ")"
+
+
+def scale_findings(snapshot: ModelSnapshot) -> list[tuple[int, str]]:
+    """Index and message of every node whose scale is not 1."""
+    return [
+        (
+            index,
+            f"Invalid scale {format_vector(snapshot.scales[index])}"
+            f' of object "{snapshot.names[index]}"',
+        )
+        for index in np.flatnonzero(np.any(snapshot.scales != 1, axis=1))
+    ]
+
+
+def check_scale(snapshot: ModelSnapshot, output: list) -> list:
+    output.extend(message for _, message in scale_findings(snapshot))
+    return output
+
+
+def location_findings(
+    snapshot: ModelSnapshot, spec: Spec = SPEC
+) -> list[tuple[int, str]]:
+    # if obj.location != Vector((0, 0, 0)) and obj.name not in temple_names:
+    #     output.append(f'2.1 Invalid location {obj.location} of object "{obj.name}"')
+    at_origin = np.all(snapshot.locations == 0, axis=1)
+    return [
+        (
+            index,
+            f'Pivot node "{snapshot.names[index]}" location in world origin',
+        )
+        for index in np.flatnonzero(at_origin)
+        if snapshot.names[index] in spec.pivots
+    ]
+
+
+def check_location(snapshot: ModelSnapshot, output: list):
+    output.extend(message for _, message in location_findings(snapshot))
+    return output
+
+
+def check_uv(snapshot: ModelSnapshot, uv_maps: Set):
+    for mesh in snapshot.meshes:
+        if mesh is not None:
+            uv_maps.update(mesh.uv_layer_names)
+
+    return len(uv_maps)
+
+
+def face_counts(context: RuleContext) -> tuple[np.ndarray, np.ndarray]:
+    return node_face_counts(context.snapshot, context.cache)
+
+
+@rule("scale", "Scale", "Scale of all nodes is 1")
+def scale_rule(context: RuleContext) -> int:
+    snapshot, report = context.snapshot, context.report
+    # TODO only for root
+    scale_output = scale_findings(snapshot)
+    if len(scale_output) > 0:
+        for index, error in scale_output:
+            report.add(
+                "ERROR",
+                "scale",
+                error,
+                snapshot.names[index],
+                value=snapshot.scales[index].tolist(),
+                threshold=[1.0, 1.0, 1.0],
+                fix="Apply the scale (Object > Apply > Scale)",
+            )
+    else:
+        report.add("PASSED", "scale", f"2.1 Scale of all nodes = 1")
+    return len(snapshot)
+
+
+@rule("location", "Location", "Root in the world origin, pivot nodes moved off it")
+def location_rule(context: RuleContext) -> int:
+    snapshot, report = context.snapshot, context.report
+    # TODO only for root
+    location_output = location_findings(snapshot, context.spec)
+    root_location = snapshot.locations[0]
+    if np.any(root_location != 0) or len(location_output) > 0:
+        if np.any(root_location != 0):
+            report.add(
+                "ERROR",
+                "location",
+                f"Root location {format_vector(root_location)} not (0,0,0)",
+                snapshot.names[0],
+                value=root_location.tolist(),
+                threshold=[0.0, 0.0, 0.0],
+                fix="Move the root to the world origin and apply its location",
+            )
+        if len(location_output) > 0:
+            for index, error in location_output:
+                report.add(
+                    "ERROR",
+                    "location",
+                    error,
+                    snapshot.names[index],
+                    value=snapshot.locations[index].tolist(),
+                    fix="Move its origin to the point it rotates about",
+                )
+    else:
+        pivots = ", ".join(context.spec.pivots)
+        report.add(
+            "PASSED",
+            "location",
+            "2.1/2.3 Root in (0,0,0)"
+            + (f", pivot nodes {pivots} moved off it" if pivots else ""),
+        )
+    return len(snapshot)
+
+
+def skip_rule(context: RuleContext, rule_id: str, section: str) -> int:
+    """Report rule_id as skipped for a spec without section, returns 0."""
+    context.report.add(
+        "INFO",
+        rule_id,
+        f"Skipped, the {context.spec.category} spec has no {section}",
+    )
+    return 0
+
+
+@rule("dimensions", "Dimensions", "Part sizes within the ranges of the spec")
+def dimensions_rule(context: RuleContext) -> int:
+    if not context.spec.dimensions:
+        return skip_rule(context, "dimensions", "part dimensions")
+    return check_dimensions(context.snapshot, context.report, context.spec.dimensions)
+
+
+@rule("names", "Names", "Node names and hierarchy follow the specification")
+def names_rule(context: RuleContext) -> int:
+    report = context.report
+    names_report = name_findings(context.snapshot, context.spec)
+    if len(names_report) == 0:
+        report.add("PASSED", "names", "No invalid names, contains obligatory nodes")
+    else:
+        for node, name, fix in names_report:
+            report.add("ERROR", "names", name, node, fix=fix)
+    return len(context.snapshot)
+
+
+@rule("triangles", "Triangles", "Triangle count of the model within budget")
+def triangles_rule(context: RuleContext) -> int:
+    budget, report = context.budget, context.report
+    if "total" not in budget:
+        return skip_rule(context, "triangles", "triangle budget")
+    node_triangles, node_ngons = context.shared(face_counts)
+    num_triangles = int(node_triangles.sum())
+    if num_triangles > budget["total"]:
+        report.add(
+            "ERROR",
+            "triangles",
+            f"Number of triangles too big: {num_triangles}",
+            value=num_triangles,
+            threshold=budget["total"],
+            fix="Decimate the model (Decimate to Triangle Budget)",
+        )
+    else:
+        report.add(
+            "PASSED",
+            "triangles",
+            f"Number of triangles <{budget['total']}: {num_triangles}",
+            value=num_triangles,
+            threshold=budget["total"],
+        )
+    return num_triangles + int(node_ngons.sum())
+
+
+@rule("budget", "Triangle budget", "Triangles of every group and side within budget")
+def budget_rule(context: RuleContext) -> int:
+    if "total" not in context.budget:
+        return skip_rule(context, "budget", "triangle budget")
+    node_triangles, _ = context.shared(face_counts)
+    check_budget(context.snapshot, node_triangles, context.budget, context.report)
+    return len(context.snapshot)
+
+
+@rule("ngons", "Ngons", "All faces are triangles")
+def ngons_rule(context: RuleContext) -> int:
+    node_triangles, node_ngons = context.shared(face_counts)
+    num_ngons = int(node_ngons.sum())
+    if num_ngons > 0:
+        context.report.add(
+            "ERROR",
+            "ngons",
+            f"Number of ngons >0: {num_ngons}",
+            value=num_ngons,
+            threshold=0,
+            fix="Triangulate the faces (Face > Triangulate Faces)",
+        )
+    else:
+        context.report.add("PASSED", "ngons", "All faces are triangles")
+    return int(node_triangles.sum()) + num_ngons
+
+
+@rule("materials", "Materials", "Number of distinct materials")
+def materials_rule(context: RuleContext) -> int:
+    materials = set()
+    count_materials(context.snapshot, materials)
+    context.report.add(
+        "INFO",
+        "materials",
+        f"Materials: {len(materials)}",
+        value=len(materials),
+    )
+    return sum(mesh is not None for mesh in context.snapshot.meshes)
+
+
+@rule("uv", "UV maps", "Names of the UV maps of all meshes")
+def uv_rule(context: RuleContext) -> int:
+    uv_maps = set()
+    check_uv(context.snapshot, uv_maps)
+    context.report.add(
+        "INFO",
+        "uv",
+        "UV maps: " + (", ".join(sorted(uv_maps)) or "none"),
+        value=len(uv_maps),
+    )
+    return sum(mesh is not None for mesh in context.snapshot.meshes)
+
+
+@rule("uv_layout", "UV layout", "Overlaps, out-of-bounds UVs and texel density")
+def uv_layout_rule(context: RuleContext) -> int:
+    return check_uv_layout(context.snapshot, context.report, context.cache)
+
+
+@rule("non_manifold", "Non-manifold edges", "No edge is shared by more than two faces")
+def non_manifold_rule(context: RuleContext) -> int:
+    return check_hygiene(
+        context.snapshot, context.report, "non_manifold", context.cache
+    )
+
+
+@rule("loose_vertices", "Loose vertices", "Every vertex belongs to a face")
+def loose_vertices_rule(context: RuleContext) -> int:
+    return check_hygiene(
+        context.snapshot, context.report, "loose_vertices", context.cache
+    )
+
+
+@rule("duplicate_vertices", "Duplicate vertices", "No vertices at the same position")
+def duplicate_vertices_rule(context: RuleContext) -> int:
+    return check_hygiene(
+        context.snapshot, context.report, "duplicate_vertices", context.cache
+    )
+
+
+@rule("zero_area", "Zero-area faces", "No degenerate faces")
+def zero_area_rule(context: RuleContext) -> int:
+    return check_hygiene(
+        context.snapshot, context.report, "zero_area", context.cache
+    )
+
+
+@rule("render_cost", "Render cost", "Draw calls, vertices and memory within limits")
+def render_cost_rule(context: RuleContext) -> int:
+    check_render_cost(
+        context.snapshot, context.render_limits, context.report, context.cache
+    )
+    return sum(mesh.num_loops for mesh in context.snapshot.meshes if mesh is not None)
+
+
+@rule("symmetry", "Symmetry", "Left and right parts are mirrored")
+def symmetry_rule(context: RuleContext) -> int:
+    check_symmetry(context.snapshot, context.report, context.cache)
+    return sum(
+        mesh.num_vertices for mesh in context.snapshot.meshes if mesh is not None
+    )
+
+
+def check_model(
+    snapshot: ModelSnapshot,
+    cache: dict | None = None,
+    budget: dict | None = None,
+    render_limits: dict | None = None,
+    rule_flags: dict | None = None,
+    threads: int = 1,
+    spec: Spec = SPEC,
+) -> Report:
+    """Run all enabled rules of the registry.
+
+    budget and render_limits default to budget.triangle_budget() of spec and
+    budget.render_budget(). cache keeps per-object results between runs, see
+    node_face_counts. rule_flags maps rule ids to enabled, rules not in
+    it keep their default. spec is the hierarchy of the product category the
+    model is checked against. With several threads, the mesh arrays are read on
+    the calling thread first, as are the fingerprints and cache entries of all
+    meshes, and the rules then run concurrently and only add to the entries.
+    """
+    if budget is None:
+        budget = triangle_budget(spec=spec)
+    if render_limits is None:
+        render_limits = render_budget()
+    if cache is not None:
+        prune_cache(cache, snapshot.keys)
+    context = RuleContext(snapshot, Report(), cache, budget, render_limits, spec)
+    if threads > 1:
+        snapshot.materialize()
+        if cache is not None:
+            for key, mesh in zip(snapshot.keys, snapshot.meshes):
+                if mesh is not None:
+                    cache_entry(cache, key, mesh.fingerprint())
+    report = run_rules(context, enabled_rules(rule_flags), threads)
+    report.set_paths(snapshot.names, snapshot.paths())
+    report.root = snapshot.names[0]
+    return report
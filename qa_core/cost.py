@@ -0,0 +1,131 @@
+"""Estimate of what a model costs the AR renderer at runtime."""
+import numpy as np
+
+from .model import MeshData, ModelSnapshot
+from .report import Report
+from .rules import cache_entry
+
+POSITION_BYTES = 12
+NORMAL_BYTES = 12
+UV_BYTES = 8
+# A full mip chain adds a third to the size of the base level
+MIPMAP_FACTOR = 4 / 3
+RGBA_BYTES = 4
+# Corner normals closer than this are one GPU vertex
+NORMAL_PRECISION = 1e-4
+
+
+def gpu_vertex_count(mesh: MeshData) -> int:
+    """Vertices after splitting at UV seams and sharp normals.
+
+    Corners become the same GPU vertex when they share the vertex, every UV
+    coordinate and the (quantized) normal.
+    """
+    if mesh.num_loops == 0:
+        return 0
+    columns = [mesh.loop_vertices.astype(np.int64)[:, None]]
+    for uv in mesh.uv_layers.values():
+        columns.append(np.ascontiguousarray(uv, dtype=np.float32).view(np.int32))
+    columns.append(np.round(mesh.loop_normals / NORMAL_PRECISION).astype(np.int64))
+    keys = np.ascontiguousarray(np.hstack(columns).astype(np.int64))
+    rows = keys.view(np.dtype((np.void, keys.dtype.itemsize * keys.shape[1])))
+    return len(np.unique(rows))
+
+
+def mesh_cost(mesh: MeshData) -> tuple[int, int, int, tuple]:
+    """Draw calls, GPU vertices, buffer bytes and material names of mesh."""
+    slots = np.unique(mesh.material_indices)
+    vertices = gpu_vertex_count(mesh)
+    stride = POSITION_BYTES + NORMAL_BYTES + UV_BYTES * len(mesh.uv_layers)
+    index_bytes = 2 if vertices < 2**16 else 4
+    triangles = mesh.num_loops - 2 * mesh.num_polygons
+    materials = tuple(
+        mesh.materials[slot]
+        for slot in slots
+        if slot < len(mesh.materials) and mesh.materials[slot] is not None
+    )
+    return (
+        len(slots),
+        vertices,
+        vertices * stride + 3 * triangles * index_bytes,
+        materials,
+    )
+
+
+def estimate_render_cost(snapshot: ModelSnapshot, cache: dict | None = None) -> dict:
+    """Runtime cost of the model, meshes used by several nodes count per node.
+
+    With a cache, the cost of every mesh is stored with its fingerprint in the
+    entry of its first node and only computed again when the mesh changed.
+    """
+    costs = {}
+    for mesh, index in snapshot.mesh_nodes().items():
+        if cache is None:
+            costs[mesh] = mesh_cost(mesh)
+            continue
+        entry = cache_entry(cache, snapshot.keys[index], mesh.fingerprint())
+        if "render_cost" not in entry:
+            entry["render_cost"] = mesh_cost(mesh)
+        costs[mesh] = entry["render_cost"]
+
+    draw_calls = 0
+    gpu_vertices = 0
+    buffer_bytes = 0
+    materials = set()
+    for mesh in snapshot.meshes:
+        if mesh in costs:
+            mesh_calls, vertices, mesh_bytes, mesh_materials = costs[mesh]
+            draw_calls += mesh_calls
+            gpu_vertices += vertices
+            buffer_bytes += mesh_bytes
+            materials.update(mesh_materials)
+
+    texture_bytes = sum(
+        int(width * height * RGBA_BYTES * MIPMAP_FACTOR)
+        for _, width, height in snapshot.textures
+    )
+    return {
+        "draw_calls": draw_calls,
+        "materials": len(materials),
+        "gpu_vertices": gpu_vertices,
+        "texture_bytes": texture_bytes,
+        "gpu_bytes": buffer_bytes + texture_bytes,
+    }
+
+
+# Suggested fix of every render cost over its limit
+COST_FIXES = {
+    "draw_calls": "Join parts that share a material",
+    "materials": "Merge similar materials",
+    "gpu_vertices": "Decimate the model or remove UV and normal seams",
+    "texture_bytes": "Downscale the textures",
+    "gpu_bytes": "Decimate the model or downscale the textures",
+}
+
+
+def check_render_cost(
+    snapshot: ModelSnapshot, limits: dict, report: Report, cache: dict | None = None
+):
+    cost = estimate_render_cost(snapshot, cache)
+    report.add(
+        "INFO",
+        "render_cost",
+        f"Render cost: {cost['draw_calls']} draw calls, {cost['materials']} materials,"
+        f" {cost['gpu_vertices']} GPU vertices,"
+        f" {cost['texture_bytes'] / 2**20:.1f} MB textures,"
+        f" {cost['gpu_bytes'] / 2**20:.1f} MB GPU memory",
+    )
+    over_limit = [name for name in limits if cost[name] > limits[name]]
+    for name in over_limit:
+        report.add(
+            "ERROR",
+            "render_cost",
+            f"Render cost {name.replace('_', ' ')} over device limit:"
+            f" {cost[name]} > {limits[name]}",
+            value=cost[name],
+            threshold=limits[name],
+            fix=COST_FIXES[name],
+        )
+    if not over_limit:
+        report.add("PASSED", "render_cost", "Render cost within device limits")
+    return cost
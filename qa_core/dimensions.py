@@ -0,0 +1,75 @@
+"""Real-world dimensions of the named parts, compared to the spec.
+
+Parts are measured by their world-space axis aligned bounding box, the union
+of the boxes of all meshes below them. The dimensions section of the spec of
+a product category lists the allowed range of every dimension in meters.
+"""
+import numpy as np
+
+from .model import ModelSnapshot
+from .report import Report
+
+AXES = {"x": 0, "y": 1, "z": 2}
+
+
+def node_bounds(snapshot: ModelSnapshot) -> tuple[np.ndarray, np.ndarray]:
+    """(N, 3) world-space minimum and maximum of every node and its children.
+
+    Nodes without meshes below them have an infinite minimum and maximum.
+    """
+    low = np.full((len(snapshot), 3), np.inf)
+    high = np.full((len(snapshot), 3), -np.inf)
+    world = snapshot.world_matrices()
+    for index, mesh in enumerate(snapshot.meshes):
+        if mesh is None or mesh.num_vertices == 0:
+            continue
+        matrix = world[index]
+        points = mesh.vertices @ matrix[:3, :3].T.astype(mesh.vertices.dtype)
+        low[index] = points.min(axis=0) + matrix[:3, 3]
+        high[index] = points.max(axis=0) + matrix[:3, 3]
+    # Children come after their parents, so every node is final when reached
+    for index in range(len(snapshot) - 1, 0, -1):
+        parent = snapshot.parents[index]
+        low[parent] = np.minimum(low[parent], low[index])
+        high[parent] = np.maximum(high[parent], high[index])
+    return low, high
+
+
+def measure_dimensions(snapshot: ModelSnapshot, dimensions: dict) -> list[tuple]:
+    """Dimension id, node index and size of every listed part in the model."""
+    low, high = node_bounds(snapshot)
+    index_of = {name: index for index, name in enumerate(snapshot.names)}
+    sizes = []
+    for dimension, limits in dimensions.items():
+        axis = AXES[limits["axis"]]
+        for part in limits["parts"]:
+            index = index_of.get(part)
+            if index is not None and np.isfinite(low[index, axis]):
+                size = float(high[index, axis] - low[index, axis])
+                sizes.append((dimension, index, size))
+    return sizes
+
+
+def check_dimensions(snapshot: ModelSnapshot, report: Report, dimensions: dict) -> int:
+    """Compare the part sizes to dimensions, returns the dimensions measured."""
+    sizes = measure_dimensions(snapshot, dimensions)
+    errors = 0
+    for dimension, index, size in sizes:
+        limits = dimensions[dimension]
+        if limits["min"] <= size <= limits["max"]:
+            continue
+        node = snapshot.names[index]
+        report.add(
+            "ERROR",
+            "dimensions",
+            f'{limits["title"]} of "{node}" {size * 1000:.1f} mm not in'
+            f' {limits["min"] * 1000:.0f}-{limits["max"] * 1000:.0f} mm',
+            node,
+            value=size,
+            threshold=[limits["min"], limits["max"]],
+            fix="Check the import units and scale the model to meters",
+        )
+        errors += 1
+    if sizes and errors == 0:
+        report.add("PASSED", "dimensions", "Part dimensions within the spec")
+    return len(sizes)
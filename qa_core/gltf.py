@@ -0,0 +1,429 @@
+"""Build model snapshots from glTF 2.0 files (.gltf and .glb).
+
+Binary buffers are memory-mapped and accessors are NumPy views into them, so
+only the JSON is parsed up front. Mesh arrays are read on first access; face
+statistics come from the accessor counts without touching the buffers.
+"""
+import base64
+import functools
+import json
+import mmap
+import os
+import struct
+
+import numpy as np
+
+from .model import MeshData, ModelSnapshot
+
+GLB_MAGIC = b"glTF"
+GLB_CHUNK_JSON = 0x4E4F534A
+GLB_CHUNK_BIN = 0x004E4942
+
+COMPONENT_TYPES = {
+    5120: np.int8,
+    5121: np.uint8,
+    5122: np.int16,
+    5123: np.uint16,
+    5125: np.uint32,
+    5126: np.float32,
+}
+NUM_COMPONENTS = {
+    "SCALAR": 1,
+    "VEC2": 2,
+    "VEC3": 3,
+    "VEC4": 4,
+    "MAT2": 4,
+    "MAT3": 9,
+    "MAT4": 16,
+}
+MODE_TRIANGLES = 4
+MODE_TRIANGLE_STRIP = 5
+MODE_TRIANGLE_FAN = 6
+
+# glTF is Y-up, nodes and vertices are converted to Blender's Z-up axes the
+# same way the Blender glTF importer does it.
+Y_UP_TO_Z_UP = np.array(
+    [[1, 0, 0, 0], [0, 0, -1, 0], [0, 1, 0, 0], [0, 0, 0, 1]], dtype=np.float64
+)
+
+
+class GltfFile:
+    """Parsed glTF document with its memory-mapped binary buffers."""
+
+    def __init__(self, path: str):
+        self.path = path
+        data = map_file(path)
+
+        glb_buffer = None
+        if data[:4] == GLB_MAGIC:
+            self.json, glb_buffer = parse_glb(data)
+        else:
+            self.json = json.loads(bytes(data))
+
+        self.buffers = []
+        for buffer in self.json.get("buffers", []):
+            uri = buffer.get("uri")
+            if uri is None:
+                self.buffers.append(glb_buffer)
+            elif uri.startswith("data:"):
+                self.buffers.append(base64.b64decode(uri.split(",", 1)[1]))
+            else:
+                self.buffers.append(map_file(os.path.join(os.path.dirname(path), uri)))
+
+    def image_bytes(self, image: dict) -> bytes:
+        if "bufferView" in image:
+            view = self.json["bufferViews"][image["bufferView"]]
+            start = view.get("byteOffset", 0)
+            return self.buffers[view["buffer"]][start : start + view["byteLength"]]
+        if image.get("uri", "").startswith("data:"):
+            return base64.b64decode(image["uri"].split(",", 1)[1])
+        return map_file(os.path.join(os.path.dirname(self.path), image["uri"]))
+
+    def textures(self) -> list[tuple[str, int, int]]:
+        """Name and size of every PNG or JPEG image, other formats are skipped."""
+        textures = []
+        for index, image in enumerate(self.json.get("images", [])):
+            size = image_size(bytes(self.image_bytes(image)[:2**16]))
+            if size is not None:
+                textures.append((image.get("name", f"Image_{index}"), *size))
+        return textures
+
+    def accessor(self, index: int) -> np.ndarray:
+        """Accessor data as (count, components) array, a view where possible."""
+        accessor = self.json["accessors"][index]
+        dtype = np.dtype(COMPONENT_TYPES[accessor["componentType"]])
+        components = NUM_COMPONENTS[accessor["type"]]
+        count = accessor["count"]
+
+        if "bufferView" in accessor:
+            view = self.json["bufferViews"][accessor["bufferView"]]
+            stride = view.get("byteStride", dtype.itemsize * components)
+            array = np.ndarray(
+                (count, components),
+                dtype=dtype,
+                buffer=self.buffers[view["buffer"]],
+                offset=view.get("byteOffset", 0) + accessor.get("byteOffset", 0),
+                strides=(stride, dtype.itemsize),
+            )
+        else:
+            array = np.zeros((count, components), dtype=dtype)
+
+        if "sparse" in accessor:
+            array = self.apply_sparse(array, accessor["sparse"])
+        if accessor.get("normalized") and dtype.kind in "iu":
+            array = np.maximum(array / np.iinfo(dtype).max, -1.0)
+        return array
+
+    def apply_sparse(self, array: np.ndarray, sparse: dict) -> np.ndarray:
+        array = array.copy()
+        indices = self.sparse_view(
+            sparse["indices"],
+            np.dtype(COMPONENT_TYPES[sparse["indices"]["componentType"]]),
+            sparse["count"],
+        )
+        values = self.sparse_view(
+            sparse["values"], array.dtype, sparse["count"] * array.shape[1]
+        )
+        array[indices] = values.reshape(-1, array.shape[1])
+        return array
+
+    def sparse_view(self, sparse_part: dict, dtype: np.dtype, count: int):
+        view = self.json["bufferViews"][sparse_part["bufferView"]]
+        return np.frombuffer(
+            self.buffers[view["buffer"]],
+            dtype=dtype,
+            count=count,
+            offset=view.get("byteOffset", 0) + sparse_part.get("byteOffset", 0),
+        )
+
+
+class GltfMesh(MeshData):
+    """MeshData of a glTF mesh, all primitives merged into one mesh."""
+
+    def __init__(self, gltf: GltfFile, index: int):
+        self.gltf = gltf
+        self.primitives = gltf.json["meshes"][index]["primitives"]
+        self.name = gltf.json["meshes"][index].get("name", f"Mesh_{index}")
+
+        materials = gltf.json.get("materials", [])
+        primitive_materials = [
+            materials[primitive["material"]].get(
+                "name", f"Material_{primitive['material']}"
+            )
+            if "material" in primitive
+            else None
+            for primitive in self.primitives
+        ]
+        # One material slot per distinct material, like the Blender importer
+        self.materials = list(dict.fromkeys(primitive_materials))
+        self.primitive_slots = [
+            self.materials.index(material) for material in primitive_materials
+        ]
+        self.triangle_counts = [
+            primitive_triangles(gltf.json, primitive) for primitive in self.primitives
+        ]
+
+    @functools.cached_property
+    def vertex_counts(self) -> list[int]:
+        accessors = self.gltf.json["accessors"]
+        return [
+            accessors[primitive["attributes"]["POSITION"]]["count"]
+            for primitive in self.primitives
+        ]
+
+    @functools.cached_property
+    def triangles(self) -> list[np.ndarray]:
+        """(T, 3) corners of every primitive, indexing its own vertices."""
+        triangles = []
+        for primitive, count in zip(self.primitives, self.vertex_counts):
+            if "indices" in primitive:
+                indices = self.gltf.accessor(primitive["indices"]).ravel()
+            else:
+                indices = np.arange(count)
+            triangles.append(
+                triangulate(indices, primitive.get("mode", MODE_TRIANGLES))
+            )
+        return triangles
+
+    @functools.cached_property
+    def vertices(self) -> np.ndarray:
+        positions = np.concatenate(
+            [
+                self.gltf.accessor(primitive["attributes"]["POSITION"])
+                for primitive in self.primitives
+            ]
+        )
+        return np.column_stack((positions[:, 0], -positions[:, 2], positions[:, 1]))
+
+    @functools.cached_property
+    def loop_totals(self) -> np.ndarray:
+        return np.full(self.num_polygons, 3, dtype=np.int32)
+
+    @functools.cached_property
+    def loop_vertices(self) -> np.ndarray:
+        offsets = np.cumsum([0] + self.vertex_counts[:-1])
+        return np.concatenate(
+            [
+                triangles.ravel().astype(np.int32) + offset
+                for triangles, offset in zip(self.triangles, offsets)
+            ]
+        )
+
+    @functools.cached_property
+    def material_indices(self) -> np.ndarray:
+        return np.repeat(
+            np.array(self.primitive_slots, dtype=np.int32), self.triangle_counts
+        )
+
+    @functools.cached_property
+    def loop_normals(self) -> np.ndarray:
+        normals = []
+        for primitive, triangles in zip(self.primitives, self.triangles):
+            if "NORMAL" in primitive["attributes"]:
+                normal = self.gltf.accessor(primitive["attributes"]["NORMAL"])
+                normal = normal[triangles.ravel()]
+                normals.append(
+                    np.column_stack((normal[:, 0], -normal[:, 2], normal[:, 1]))
+                )
+            else:
+                normals.append(np.zeros((triangles.size, 3), dtype=np.float32))
+        return np.concatenate(normals)
+
+    @functools.cached_property
+    def uv_layers(self) -> dict:
+        uv_layers = {}
+        for name in self.uv_layer_names:
+            layer = []
+            for primitive, triangles in zip(self.primitives, self.triangles):
+                uv = self.gltf.accessor(primitive["attributes"][name])
+                uv = uv[triangles.ravel()]
+                # Blender's V axis points the other way
+                layer.append(np.column_stack((uv[:, 0], 1.0 - uv[:, 1])))
+            uv_layers[name] = np.concatenate(layer)
+        return uv_layers
+
+    @property
+    def num_vertices(self) -> int:
+        return sum(self.vertex_counts)
+
+    @property
+    def num_polygons(self) -> int:
+        return sum(self.triangle_counts)
+
+    @property
+    def num_loops(self) -> int:
+        return 3 * self.num_polygons
+
+    @property
+    def uv_layer_names(self) -> list[str]:
+        """UV maps present in every primitive."""
+        names = [
+            {name for name in primitive["attributes"] if name.startswith("TEXCOORD_")}
+            for primitive in self.primitives
+        ]
+        return sorted(set.intersection(*names)) if names else []
+
+
+def image_size(header: bytes) -> tuple[int, int] | None:
+    """Width and height from the header of a PNG or JPEG image."""
+    if header[:8] == b"\x89PNG\r\n\x1a\n":
+        return struct.unpack(">II", header[16:24])
+    if header[:2] == b"\xff\xd8":
+        offset = 2
+        while offset + 9 < len(header):
+            marker, length = struct.unpack(">BH", header[offset + 1 : offset + 4])
+            # Start of frame markers, except DHT, JPG and DAC
+            if 0xC0 <= marker <= 0xCF and marker not in (0xC4, 0xC8, 0xCC):
+                height, width = struct.unpack(">HH", header[offset + 5 : offset + 9])
+                return width, height
+            offset += 2 + length
+    return None
+
+
+def map_file(path: str):
+    with open(path, "rb") as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            return b""
+        return memoryview(mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ))
+
+
+def primitive_triangles(document: dict, primitive: dict) -> int:
+    """Number of triangles of a primitive, from the accessor counts only."""
+    accessor = primitive.get("indices", primitive["attributes"]["POSITION"])
+    count = document["accessors"][accessor]["count"]
+    mode = primitive.get("mode", MODE_TRIANGLES)
+    if mode == MODE_TRIANGLES:
+        return count // 3
+    if mode in (MODE_TRIANGLE_STRIP, MODE_TRIANGLE_FAN):
+        return max(count - 2, 0)
+    return 0
+
+
+def parse_glb(data) -> tuple[dict, memoryview | None]:
+    _, version, length = struct.unpack_from("<4sII", data, 0)
+    if version != 2:
+        raise ValueError(f"Unsupported GLB version {version}")
+    document = None
+    binary = None
+    offset = 12
+    while offset < length:
+        chunk_length, chunk_type = struct.unpack_from("<II", data, offset)
+        chunk = memoryview(data)[offset + 8 : offset + 8 + chunk_length]
+        if chunk_type == GLB_CHUNK_JSON:
+            document = json.loads(bytes(chunk))
+        elif chunk_type == GLB_CHUNK_BIN and binary is None:
+            binary = chunk
+        offset += 8 + chunk_length
+    if document is None:
+        raise ValueError("GLB file without JSON chunk")
+    return document, binary
+
+
+def triangulate(indices: np.ndarray, mode: int) -> np.ndarray:
+    """(T, 3) triangle corners of a primitive, empty for points and lines."""
+    if mode == MODE_TRIANGLES:
+        return indices.reshape(-1, 3)
+    if mode not in (MODE_TRIANGLE_STRIP, MODE_TRIANGLE_FAN) or len(indices) < 3:
+        return np.zeros((0, 3), dtype=indices.dtype)
+
+    first = np.arange(len(indices) - 2)
+    if mode == MODE_TRIANGLE_FAN:
+        corners = np.column_stack((np.zeros_like(first), first + 1, first + 2))
+    else:
+        corners = np.column_stack((first, first + 1, first + 2))
+        # Every second triangle of a strip is reversed to keep the winding
+        corners[1::2, :2] = corners[1::2, 1::-1]
+    return indices[corners]
+
+
+def node_matrix(node: dict) -> np.ndarray:
+    if "matrix" in node:
+        return np.array(node["matrix"], dtype=np.float64).reshape(4, 4).T
+
+    x, y, z, w = node.get("rotation", (0, 0, 0, 1))
+    rotation = np.array(
+        [
+            [1 - 2 * (y * y + z * z), 2 * (x * y - z * w), 2 * (x * z + y * w)],
+            [2 * (x * y + z * w), 1 - 2 * (x * x + z * z), 2 * (y * z - x * w)],
+            [2 * (x * z - y * w), 2 * (y * z + x * w), 1 - 2 * (x * x + y * y)],
+        ]
+    )
+    matrix = np.identity(4)
+    matrix[:3, :3] = rotation * np.array(node.get("scale", (1, 1, 1)))
+    matrix[:3, 3] = node.get("translation", (0, 0, 0))
+    return matrix
+
+
+def node_location_scale(node: dict) -> tuple[tuple, tuple]:
+    """Location and scale in Blender's axes, exact for TRS nodes."""
+    if "matrix" in node:
+        matrix = node_matrix(node)
+        x, y, z = matrix[:3, 3]
+        sx, sy, sz = np.linalg.norm(matrix[:3, :3], axis=0)
+    else:
+        x, y, z = node.get("translation", (0, 0, 0))
+        sx, sy, sz = node.get("scale", (1, 1, 1))
+    return (x, -z, y), (sx, sz, sy)
+
+
+def load_gltf(path: str) -> ModelSnapshot:
+    """Snapshot of the default scene of a glTF file.
+
+    A scene with several root nodes is wrapped in an empty root named after
+    the scene, so that the roots are checked as the groups of one model.
+    """
+    gltf = GltfFile(path)
+    document = gltf.json
+    nodes = document.get("nodes", [])
+    scenes = document.get("scenes", [{"nodes": list(range(len(nodes)))}])
+    scene = scenes[document.get("scene", 0)]
+
+    # Breadth first, None stands for the synthetic root of several roots
+    order = list(scene.get("nodes", []))
+    parents = [-1] * len(order)
+    if len(order) != 1:
+        order.insert(0, None)
+        parents = [-1] + [0] * (len(order) - 1)
+    for position, node_index in enumerate(order):
+        if node_index is not None:
+            for child in nodes[node_index].get("children", []):
+                order.append(child)
+                parents.append(position)
+
+    names, types, matrices, locations, scales = [], [], [], [], []
+    meshes = {}
+    node_meshes = []
+    for node_index in order:
+        if node_index is None:
+            names.append(scene.get("name", "Scene"))
+            types.append("EMPTY")
+            matrices.append(np.identity(4))
+            locations.append((0, 0, 0))
+            scales.append((1, 1, 1))
+            node_meshes.append(None)
+            continue
+        node = nodes[node_index]
+        names.append(node.get("name", f"Node_{node_index}"))
+        matrices.append(Y_UP_TO_Z_UP @ node_matrix(node) @ Y_UP_TO_Z_UP.T)
+        location, scale = node_location_scale(node)
+        locations.append(location)
+        scales.append(scale)
+        if "mesh" in node:
+            types.append("MESH")
+            if node["mesh"] not in meshes:
+                meshes[node["mesh"]] = GltfMesh(gltf, node["mesh"])
+            node_meshes.append(meshes[node["mesh"]])
+        else:
+            types.append("CAMERA" if "camera" in node else "EMPTY")
+            node_meshes.append(None)
+
+    return ModelSnapshot(
+        names=names,
+        types=types,
+        parents=parents,
+        locations=locations,
+        scales=scales,
+        matrices=matrices,
+        meshes=node_meshes,
+        textures=gltf.textures(),
+    )
@@ -0,0 +1,124 @@
+"""Uniform grid over a point set for neighbour queries with NumPy only.
+
+Points are sorted by the int64 key of their grid cell, so the points of any
+cell are one range of the sorted order, found by np.searchsorted in the keys
+of the occupied cells. A query
+gathers the points of the 3x3x3 cells around its own cell; points closer to
+it than the boundary of that block are certainly among them.
+"""
+import itertools
+
+import numpy as np
+
+# Cell offsets of the block around a cell
+OFFSETS = np.array(list(itertools.product((-1, 0, 1), repeat=3)), dtype=np.int64)
+# Most cells per axis, keeps the cell keys within int64
+MAX_CELLS = 2**20
+# Query and point pairs gathered at once, bounds the memory of a query
+MAX_PAIRS = 2**22
+
+
+def ranges(starts: np.ndarray, counts: np.ndarray) -> np.ndarray:
+    """Concatenation of arange(start, start + count) for every start, count."""
+    offsets = np.cumsum(counts) - counts
+    return np.repeat(starts - offsets, counts) + np.arange(counts.sum())
+
+
+class PointGrid:
+    """Points of an (N, 3) array sorted into cubic cells of size cell.
+
+    The cell is enlarged when the points would span more than MAX_CELLS cells
+    along an axis.
+    """
+
+    def __init__(self, points: np.ndarray, cell: float):
+        self.points = np.asarray(points, dtype=np.float64)
+        self.origin = self.points.min(axis=0)
+        span = float(np.ptp(self.points, axis=0).max())
+        self.cell = max(cell, span / (MAX_CELLS - 1)) or 1.0
+        cells = self.cells(self.points)
+        self.extents = cells.max(axis=0) + 1
+        keys = self.keys(cells)
+        self.order = np.argsort(keys, kind="stable")
+        # Key, first position in order and number of points of occupied cells
+        self.cell_keys, self.cell_starts, self.cell_counts = np.unique(
+            keys[self.order], return_index=True, return_counts=True
+        )
+
+    def cells(self, points: np.ndarray) -> np.ndarray:
+        """(Q, 3) cell of every point, outside the grid for outside points."""
+        return np.floor((points - self.origin) / self.cell).astype(np.int64)
+
+    def keys(self, cells: np.ndarray) -> np.ndarray:
+        x, y, z = cells[..., 0], cells[..., 1], cells[..., 2]
+        return (x * self.extents[1] + y) * self.extents[2] + z
+
+    def query_cells(self, queries: np.ndarray, clamp: bool) -> np.ndarray:
+        cells = self.cells(queries)
+        if clamp:
+            cells = np.clip(cells, 0, self.extents - 1)
+        return cells
+
+    def block_distances(
+        self, queries: np.ndarray, clamp: bool = False
+    ) -> np.ndarray:
+        """Distance from every query to the boundary of its block of cells.
+
+        Sides at the edge of the grid have no points beyond them and do not
+        count, the distance is infinite when no side counts.
+        """
+        cells = self.query_cells(queries, clamp)
+        low = self.origin + (cells - 1) * self.cell
+        high = low + 3 * self.cell
+        below = np.where(cells - 1 > 0, queries - low, np.inf)
+        above = np.where(cells + 2 < self.extents, high - queries, np.inf)
+        return np.minimum(below, above).min(axis=1)
+
+    def neighbour_pairs(self, queries: np.ndarray, clamp: bool = False):
+        """Yield (query index, point index) arrays of the points near queries.
+
+        Pairs are ordered by query and yielded in chunks of about MAX_PAIRS.
+        With clamp, queries outside the grid use the nearest cell inside it.
+        """
+        cells = self.query_cells(queries, clamp)[:, None, :] + OFFSETS
+        inside = ((cells >= 0) & (cells < self.extents)).all(axis=2)
+        keys = self.keys(cells)
+        found = np.searchsorted(self.cell_keys, keys)
+        found[found == len(self.cell_keys)] = 0
+        occupied = inside & (self.cell_keys[found] == keys)
+        starts = self.cell_starts[found]
+        counts = np.where(occupied, self.cell_counts[found], 0)
+        # Split between queries once the pairs of the chunk exceed MAX_PAIRS
+        totals = np.cumsum(counts.sum(axis=1))
+        first = 0
+        while first < len(queries):
+            done = totals[first - 1] if first > 0 else 0
+            last = int(np.searchsorted(totals, done + MAX_PAIRS, side="right"))
+            last = max(last, first + 1)
+            chunk_counts = counts[first:last].ravel()
+            query_index = np.repeat(
+                np.repeat(np.arange(first, last), len(OFFSETS)), chunk_counts
+            )
+            positions = ranges(starts[first:last].ravel(), chunk_counts)
+            yield query_index, self.order[positions]
+            first = last
+
+    def nearest_candidates(
+        self, queries: np.ndarray, clamp: bool = False
+    ) -> np.ndarray:
+        """Distance of every query to the nearest point of its block of cells.
+
+        Infinite for queries without points in their block. It is the distance
+        to the nearest of all points where not above block_distances().
+        """
+        nearest = np.full(len(queries), np.inf)
+        for query_index, point_index in self.neighbour_pairs(queries, clamp):
+            if len(query_index) == 0:
+                continue
+            offsets = queries[query_index] - self.points[point_index]
+            squared = np.einsum("ij,ij->i", offsets, offsets)
+            groups = np.flatnonzero(np.diff(query_index, prepend=-1))
+            nearest[query_index[groups]] = np.sqrt(
+                np.minimum.reduceat(squared, groups)
+            )
+        return nearest
@@ -0,0 +1,187 @@
+"""Mesh hygiene: geometry the runtime cannot render or skin reliably.
+
+All checks work on the loop and vertex arrays of a mesh. Edges are the pairs
+of consecutive polygon corners; their use is counted with np.unique on one
+int64 key per edge. Duplicate vertices are found with grids of cells of twice
+MERGE_DISTANCE, shifted by half a cell along every combination of axes: two
+vertices that close share a cell in at least one of the eight grids. Sorting
+the cell keys of a grid finds the few cells with several vertices, whose real
+distances are then compared, like Blender's Merge by Distance.
+"""
+import itertools
+
+import numpy as np
+
+from .grid import MAX_CELLS, MAX_PAIRS, ranges
+from .model import MeshData, ModelSnapshot
+from .report import Report
+from .rules import cache_entry
+
+# Vertices closer than this are duplicates, in mesh units, as Blender's
+# Merge by Distance default
+MERGE_DISTANCE = 1e-4
+# Faces with a smaller area are degenerate, in squared mesh units
+MIN_FACE_AREA = 1e-12
+
+
+def polygon_edges(mesh: MeshData) -> np.ndarray:
+    """(L,) int64 key min * V + max of the edge leaving every polygon corner."""
+    loop_totals = mesh.loop_totals.astype(np.int64)
+    ends = np.cumsum(loop_totals)
+    following = np.arange(1, mesh.num_loops + 1)
+    # The last corner of every polygon is followed by its first
+    following[ends[loop_totals > 0] - 1] = (ends - loop_totals)[loop_totals > 0]
+    start = mesh.loop_vertices.astype(np.int64)
+    end = start[following]
+    return np.minimum(start, end) * mesh.num_vertices + np.maximum(start, end)
+
+
+def non_manifold_edges(mesh: MeshData) -> int:
+    """Edges shared by more than two polygons."""
+    _, uses = np.unique(polygon_edges(mesh), return_counts=True)
+    return int(np.count_nonzero(uses > 2))
+
+
+def loose_vertices(mesh: MeshData) -> int:
+    """Vertices not used by any polygon."""
+    used = np.bincount(mesh.loop_vertices, minlength=mesh.num_vertices)
+    return int(np.count_nonzero(used == 0))
+
+
+def shared_cell_pairs(keys: np.ndarray):
+    """Yield (index, index) arrays of the pairs of points with equal keys.
+
+    Pairs are yielded in chunks of about MAX_PAIRS.
+    """
+    order = np.argsort(keys)
+    sorted_keys = keys[order]
+    starts = np.flatnonzero(np.diff(sorted_keys, prepend=sorted_keys[0] - 1))
+    counts = np.diff(np.append(starts, len(keys)))
+    starts, counts = starts[counts > 1], counts[counts > 1]
+    # Every point is paired with the points after it in its cell
+    members = ranges(starts, counts)
+    later = np.repeat(starts + counts, counts) - members - 1
+    totals = np.cumsum(later)
+    first = 0
+    while first < len(members):
+        done = totals[first - 1] if first > 0 else 0
+        last = int(np.searchsorted(totals, done + MAX_PAIRS, side="right"))
+        last = max(last, first + 1)
+        chunk_members, chunk_later = members[first:last], later[first:last]
+        yield (
+            order[np.repeat(chunk_members, chunk_later)],
+            order[ranges(chunk_members + 1, chunk_later)],
+        )
+        first = last
+
+
+def duplicate_vertices(mesh: MeshData, distance: float = MERGE_DISTANCE) -> int:
+    """Vertices within distance of a vertex of lower index.
+
+    The cells are enlarged when the vertices would span more than MAX_CELLS
+    cells along an axis; two vertices within half a cell still share one.
+    """
+    if mesh.num_vertices == 0:
+        return 0
+    points = np.asarray(mesh.vertices, dtype=np.float64)
+    spans = np.ptp(points, axis=0)
+    cell = max(2 * distance, float(spans.max()) / (MAX_CELLS - 2)) or 1.0
+    extents = np.floor(spans / cell).astype(np.int64) + 2
+    positions = (points - points.min(axis=0)) / cell
+    duplicate = np.zeros(mesh.num_vertices, dtype=bool)
+    for shift in itertools.product((0.0, 0.5), repeat=3):
+        x, y, z = np.floor(positions + shift).astype(np.int64).T
+        keys = (x * extents[1] + y) * extents[2] + z
+        for vertex, other in shared_cell_pairs(keys):
+            offsets = points[vertex] - points[other]
+            close = np.einsum("ij,ij->i", offsets, offsets) <= distance**2
+            duplicate[np.maximum(vertex, other)[close]] = True
+    return int(np.count_nonzero(duplicate))
+
+
+def zero_area_polygons(mesh: MeshData) -> int:
+    """Polygons with (almost) no area, or fewer than three corners.
+
+    The area is half the length of the sum of the cross products of the fan
+    triangles of a polygon, its Newell normal, so collinear corners of an
+    otherwise valid polygon do not count.
+    """
+    triangles = mesh.loop_vertices[mesh.corner_triangles()]
+    a, b, c = (mesh.vertices[triangles[:, corner]] for corner in range(3))
+    crosses = np.cross(b - a, c - a).astype(np.float64)
+    fans = np.maximum(mesh.loop_totals.astype(np.int64) - 2, 0)
+    normals = np.zeros((mesh.num_polygons, 3))
+    if len(crosses):
+        starts = np.cumsum(fans) - fans
+        normals[fans > 0] = np.add.reduceat(crosses, starts[fans > 0])
+    # Twice the area, squared
+    squared = np.einsum("ij,ij->i", normals, normals)
+    return int(np.count_nonzero(squared < (2 * MIN_FACE_AREA) ** 2))
+
+
+# Rule id, count, severity, message and fix of every hygiene check
+HYGIENE_CHECKS = {
+    "non_manifold": (
+        non_manifold_edges,
+        "ERROR",
+        "non-manifold edges",
+        "Select and fix them (Select > Select All by Trait > Non Manifold)",
+    ),
+    "loose_vertices": (
+        loose_vertices,
+        "WARNING",
+        "loose vertices",
+        "Delete them (Mesh > Clean Up > Delete Loose)",
+    ),
+    "duplicate_vertices": (
+        duplicate_vertices,
+        "WARNING",
+        "duplicate vertices",
+        "Merge them (Mesh > Clean Up > Merge by Distance)",
+    ),
+    "zero_area": (
+        zero_area_polygons,
+        "ERROR",
+        "zero-area faces",
+        "Remove them (Mesh > Clean Up > Degenerate Dissolve)",
+    ),
+}
+
+
+def check_hygiene(
+    snapshot: ModelSnapshot, report: Report, rule: str, cache: dict | None = None
+) -> int:
+    """Run one of the HYGIENE_CHECKS on every distinct mesh.
+
+    With a cache, the counts of every check are stored with the fingerprint of
+    a mesh in the entry of its first node and only counted again when the mesh
+    changed. Returns the number of polygons checked.
+    """
+    count, severity, problem, fix = HYGIENE_CHECKS[rule]
+    polygons = 0
+    found = False
+    for mesh, index in snapshot.mesh_nodes().items():
+        polygons += mesh.num_polygons
+        if cache is None:
+            number = count(mesh)
+        else:
+            entry = cache_entry(cache, snapshot.keys[index], mesh.fingerprint())
+            counts = entry.setdefault("hygiene", {})
+            if rule not in counts:
+                counts[rule] = count(mesh)
+            number = counts[rule]
+        if number > 0:
+            node = snapshot.names[index]
+            report.add(
+                severity,
+                rule,
+                f'Mesh of "{node}" has {number} {problem}',
+                node,
+                value=number,
+                threshold=0,
+                fix=fix,
+            )
+            found = True
+    if not found:
+        report.add("PASSED", rule, f"No {problem}")
+    return polygons
@@ -0,0 +1,171 @@
+"""Plain description of a model that the QA checks run on."""
+import hashlib
+
+import numpy as np
+
+
+def array_digest(array: np.ndarray) -> bytes:
+    """Short hash of the contents of array."""
+    data = np.ascontiguousarray(array).tobytes()
+    return hashlib.blake2b(data, digest_size=16).digest()
+
+
+class MeshData:
+    """Geometry of one mesh as flat NumPy arrays.
+
+    vertices: (V, 3) vertex coordinates
+    loop_totals: (P,) number of corners of every polygon
+    loop_vertices: (L,) vertex index of every polygon corner, polygon by polygon
+    materials: material name of every slot, None for empty slots
+    material_indices: (P,) material slot of every polygon
+    uv_layers: (L, 2) UV coordinates of every corner by UV map name
+    loop_normals: (L, 3) shading normal of every corner
+    """
+
+    # Array attributes, subclasses may read them lazily from their source
+    ARRAYS = (
+        "vertices",
+        "loop_totals",
+        "loop_vertices",
+        "material_indices",
+        "loop_normals",
+        "uv_layers",
+    )
+
+    def __init__(
+        self,
+        name: str,
+        vertices: np.ndarray,
+        loop_totals: np.ndarray,
+        loop_vertices: np.ndarray,
+        materials: list | None = None,
+        material_indices: np.ndarray | None = None,
+        uv_layers: dict | None = None,
+        loop_normals: np.ndarray | None = None,
+    ):
+        self.name = name
+        self.vertices = vertices
+        self.loop_totals = loop_totals
+        self.loop_vertices = loop_vertices
+        self.materials = materials if materials is not None else []
+        self.material_indices = (
+            material_indices
+            if material_indices is not None
+            else np.zeros(len(loop_totals), dtype=np.int32)
+        )
+        self.uv_layers = uv_layers if uv_layers is not None else {}
+        self.loop_normals = (
+            loop_normals
+            if loop_normals is not None
+            else np.zeros((len(loop_vertices), 3), dtype=np.float32)
+        )
+
+    @property
+    def num_vertices(self) -> int:
+        return len(self.vertices)
+
+    @property
+    def num_polygons(self) -> int:
+        return len(self.loop_totals)
+
+    @property
+    def num_loops(self) -> int:
+        return len(self.loop_vertices)
+
+    @property
+    def uv_layer_names(self) -> list[str]:
+        return list(self.uv_layers)
+
+    def corner_triangles(self) -> np.ndarray:
+        """(T, 3) corners of a fan triangulation of every polygon."""
+        loop_totals = self.loop_totals.astype(np.int64)
+        starts = np.cumsum(loop_totals) - loop_totals
+        fans = np.maximum(loop_totals - 2, 0)
+        first = np.repeat(starts, fans)
+        offset = np.arange(fans.sum()) - np.repeat(np.cumsum(fans) - fans, fans)
+        return np.column_stack((first, first + offset + 1, first + offset + 2))
+
+    def materialize(self):
+        """Read all arrays now, later reads then need no access to the source."""
+        for name in self.ARRAYS:
+            getattr(self, name)
+
+    def fingerprint(self) -> tuple:
+        """Change fingerprint: element counts and a hash of loop_totals.
+
+        loop_totals is the only input of the face counts, and reading it is
+        cheap compared to the other arrays. Meshes that can be edited in place
+        add what detects edits keeping the topology, see BlenderMesh.
+        """
+        return (
+            self.name,
+            self.num_vertices,
+            self.num_polygons,
+            self.num_loops,
+            array_digest(self.loop_totals),
+        )
+
+
+class ModelSnapshot:
+    """Flattened hierarchy of a model.
+
+    Nodes are ordered so that every parent comes before its children and
+    index 0 is the root. Per-node data is kept in parallel arrays; matrices are
+    local to the parent. Keys identify nodes between runs for result caching.
+    Textures are (name, width, height) of the images used by the materials.
+    """
+
+    def __init__(
+        self,
+        names: list[str],
+        types: list[str],
+        parents: np.ndarray,
+        locations: np.ndarray,
+        scales: np.ndarray,
+        matrices: np.ndarray,
+        meshes: list,
+        keys: list | None = None,
+        textures: list | None = None,
+    ):
+        self.names = names
+        self.types = types
+        self.parents = np.asarray(parents, dtype=np.int32)
+        self.locations = np.asarray(locations, dtype=np.float64).reshape(-1, 3)
+        self.scales = np.asarray(scales, dtype=np.float64).reshape(-1, 3)
+        self.matrices = np.asarray(matrices, dtype=np.float64).reshape(-1, 4, 4)
+        self.meshes = meshes
+        self.keys = keys if keys is not None else list(names)
+        self.textures = textures if textures is not None else []
+
+        self.children = [[] for _ in names]
+        for index, parent in enumerate(self.parents[1:], start=1):
+            self.children[parent].append(index)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def materialize(self):
+        """Read the arrays of all meshes, e.g. before checking in threads."""
+        for mesh in {mesh for mesh in self.meshes if mesh is not None}:
+            mesh.materialize()
+
+    def mesh_nodes(self) -> dict:
+        """First node index of every distinct mesh with polygons."""
+        nodes = {}
+        for index, mesh in enumerate(self.meshes):
+            if mesh is not None and mesh.num_polygons > 0:
+                nodes.setdefault(mesh, index)
+        return nodes
+
+    def paths(self) -> list[str]:
+        """Names of every node from the root down, joined by "/"."""
+        paths = [self.names[0]]
+        for index, parent in enumerate(self.parents[1:], start=1):
+            paths.append(f"{paths[parent]}/{self.names[index]}")
+        return paths
+
+    def world_matrices(self) -> np.ndarray:
+        world = self.matrices.copy()
+        for index, parent in enumerate(self.parents[1:], start=1):
+            world[index] = world[parent] @ self.matrices[index]
+        return world
@@ -0,0 +1,155 @@
+"""QA report: the findings of all checks of a model.
+
+Reports serialize to plain JSON records for ingest pipelines and to JUnit XML
+for CI dashboards, where every finding is a test case and errors fail.
+"""
+import json
+import xml.etree.ElementTree as ElementTree
+
+SEVERITIES = ("ERROR", "INFO", "WARNING", "PASSED")
+
+
+class Finding:
+    """One result of a check, about the whole model or a single node.
+
+    node is the name of the node and path its names from the root joined by
+    "/", empty for findings about the whole model. value is what was measured
+    and threshold the limit it was compared to, both None when not numeric.
+    """
+
+    __slots__ = (
+        "severity",
+        "rule",
+        "node",
+        "path",
+        "message",
+        "value",
+        "threshold",
+        "fix",
+    )
+
+    def __init__(
+        self,
+        severity: str,
+        rule: str,
+        message: str,
+        node: str = "",
+        value=None,
+        threshold=None,
+        fix: str = "",
+        path: str = "",
+    ):
+        self.severity = severity
+        self.rule = rule
+        self.node = node
+        self.path = path
+        self.message = message
+        self.value = value
+        self.threshold = threshold
+        self.fix = fix
+
+    def to_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class Report:
+    """Findings in the order the checks produced them.
+
+    report[severity] lists the messages of one severity, as the dict reports
+    of earlier versions did. timings has the rule id, wall time in seconds and
+    number of processed items of every rule that ran. root is the name of the
+    root node of the checked model, empty if unknown.
+    """
+
+    def __init__(self):
+        self.findings: list[Finding] = []
+        self.timings: list[dict] = []
+        self.root = ""
+
+    def add(
+        self,
+        severity: str,
+        rule: str,
+        message: str,
+        node: str = "",
+        value=None,
+        threshold=None,
+        fix: str = "",
+    ) -> Finding:
+        finding = Finding(severity, rule, message, node, value, threshold, fix)
+        self.findings.append(finding)
+        return finding
+
+    def __getitem__(self, severity: str) -> list[str]:
+        return [f.message for f in self.findings if f.severity == severity]
+
+    def counts(self) -> dict[str, int]:
+        counts = dict.fromkeys(SEVERITIES, 0)
+        for finding in self.findings:
+            counts[finding.severity] += 1
+        return counts
+
+    def set_paths(self, names: list[str], paths: list[str]):
+        """Fill in the path of every finding about one of the named nodes."""
+        path_of = dict(zip(names, paths))
+        for finding in self.findings:
+            if finding.node and not finding.path:
+                finding.path = path_of.get(finding.node, "")
+
+    def as_dict(self) -> dict[str, list[str]]:
+        return {severity: self[severity] for severity in SEVERITIES}
+
+    def to_dict(self) -> dict:
+        return {
+            "counts": self.counts(),
+            "findings": [finding.to_dict() for finding in self.findings],
+            "rules": self.timings,
+        }
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict())
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Report":
+        report = cls()
+        report.findings = [Finding(**finding) for finding in data["findings"]]
+        report.timings = data.get("rules", [])
+        return report
+
+    def junit_suite(self, name: str) -> ElementTree.Element:
+        counts = self.counts()
+        suite = ElementTree.Element(
+            "testsuite",
+            name=name,
+            tests=str(len(self.findings)),
+            failures=str(counts["ERROR"]),
+            errors="0",
+            time=f"{sum(timing['seconds'] for timing in self.timings):.6f}",
+        )
+        for finding in self.findings:
+            case = ElementTree.SubElement(
+                suite,
+                "testcase",
+                classname=f"shopar_qa.{finding.rule}",
+                name=finding.path or finding.node or finding.message,
+            )
+            if finding.severity == "ERROR":
+                failure = ElementTree.SubElement(
+                    case, "failure", message=finding.message, type=finding.rule
+                )
+                failure.text = finding.fix
+            elif finding.severity != "PASSED":
+                output = ElementTree.SubElement(case, "system-out")
+                output.text = f"{finding.severity}: {finding.message}"
+        return suite
+
+    def to_junit(self, name: str = "shopar_qa") -> str:
+        return junit_xml([(name, self)])
+
+
+def junit_xml(reports: list[tuple[str, Report]]) -> str:
+    """JUnit XML with one test suite per (name, report)."""
+    suites = ElementTree.Element("testsuites")
+    for name, report in reports:
+        suites.append(report.junit_suite(name))
+    return ElementTree.tostring(suites, encoding="unicode")
@@ -0,0 +1,132 @@
+"""Registry of the QA rules and the runner that times them.
+
+A rule is a function taking a RuleContext, adding its findings to the
+context's report and returning the number of items it processed, e.g. nodes
+or polygons. Rules run in registration order; disabled ones are skipped.
+"""
+import copy
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from .model import ModelSnapshot
+from .report import Report
+from .spec import SPEC, Spec
+
+
+class Rule:
+    __slots__ = ("id", "title", "description", "function", "enabled")
+
+    def __init__(
+        self, id: str, title: str, description: str, function, enabled: bool
+    ):
+        self.id = id
+        self.title = title
+        self.description = description
+        self.function = function
+        # Default of the rule's enable flag
+        self.enabled = enabled
+
+
+RULES: dict[str, Rule] = {}
+
+
+def rule(id: str, title: str, description: str = "", enabled: bool = True):
+    """Register the decorated function as the rule id."""
+
+    def register(function):
+        RULES[id] = Rule(id, title, description, function, enabled)
+        return function
+
+    return register
+
+
+class RuleContext:
+    """Input of the rules of one run and data shared between them."""
+
+    def __init__(
+        self,
+        snapshot: ModelSnapshot,
+        report: Report,
+        cache: dict | None,
+        budget: dict,
+        render_limits: dict,
+        spec: Spec = SPEC,
+    ):
+        self.snapshot = snapshot
+        self.report = report
+        self.cache = cache
+        self.budget = budget
+        self.render_limits = render_limits
+        self.spec = spec
+        self._shared = {}
+        self._lock = threading.RLock()
+
+    def shared(self, function):
+        """function(self), computed once per run for all rules needing it."""
+        with self._lock:
+            if function not in self._shared:
+                self._shared[function] = function(self)
+            return self._shared[function]
+
+    def with_report(self, report: Report) -> "RuleContext":
+        """Context sharing everything with this one but the report."""
+        context = copy.copy(self)
+        context.report = report
+        return context
+
+
+def cache_entry(cache: dict, key, fingerprint) -> dict:
+    """Cached results of the node key, emptied when its fingerprint changed."""
+    entry = cache.get(key)
+    if entry is None or entry["fingerprint"] != fingerprint:
+        entry = cache[key] = {"fingerprint": fingerprint}
+    return entry
+
+
+def prune_cache(cache: dict, keys: list):
+    """Drop the entries of nodes not in keys, e.g. of deleted objects."""
+    for key in cache.keys() - set(keys):
+        del cache[key]
+
+
+def enabled_rules(flags: dict | None = None) -> list[Rule]:
+    """Rules to run, flags maps rule ids to enabled and overrides defaults."""
+    flags = flags or {}
+    return [r for r in RULES.values() if flags.get(r.id, r.enabled)]
+
+
+def run_rule(context: RuleContext, r: Rule) -> dict:
+    start = time.perf_counter()
+    items = r.function(context)
+    return {
+        "rule": r.id,
+        "seconds": time.perf_counter() - start,
+        "items": int(items or 0),
+    }
+
+
+def run_rules(context: RuleContext, rules: list[Rule], threads: int = 1) -> Report:
+    """Run rules, recording the time and items of each.
+
+    With several threads every rule fills a report of its own, and these are
+    merged in rule order, so the result does not depend on scheduling. Mesh
+    arrays have to be materialized and cache entries created before, see
+    check_model.
+    """
+    report = context.report
+    if threads <= 1:
+        for r in rules:
+            report.timings.append(run_rule(context, r))
+        return report
+
+    def run(r: Rule) -> tuple[Report, dict]:
+        rule_report = Report()
+        return rule_report, run_rule(context.with_report(rule_report), r)
+
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        results = list(executor.map(run, rules))
+    for rule_report, timing in results:
+        report.findings.extend(rule_report.findings)
+        report.timings.append(timing)
+    return report
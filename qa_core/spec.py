@@ -0,0 +1,180 @@
+"""Node hierarchy of the ShopAR specification, compiled for fast lookups.
+
+Every product category has a spec file, specs/<category>.json, listing its
+parts with their parent and button label, the obligatory parts, the pivots
+(groups whose origin is moved to a hinge) and the parts kept when decimating.
+Optional sections hold the triangle budgets by product line and device tier,
+the allowed part dimensions in meters and the part prototypes that names are
+proposed from; the rules and tools using a missing section are skipped.
+Spec derives from it the frozensets the name check tests membership in, and
+an n-gram index of every set of siblings for the suggestions of invalid names.
+"""
+import collections
+import functools
+import json
+import os
+
+SPEC_DIR = os.path.join(os.path.dirname(__file__), "specs")
+# Newest spec file format this version reads
+SPEC_VERSION = 1
+DEFAULT_CATEGORY = "glasses"
+# Length of the n-grams and least Dice similarity of a suggestion
+NGRAM = 2
+MIN_SIMILARITY = 0.5
+
+
+def hierarchy_order(parents: dict) -> list[str]:
+    """Parts of the hierarchy, every parent before its children."""
+    order = []
+    placed = set()
+
+    def visit(name: str):
+        if name in placed or name not in parents:
+            return
+        visit(parents[name])
+        placed.add(name)
+        order.append(name)
+
+    for name in parents:
+        visit(name)
+    return order
+
+
+def ngrams(name: str) -> frozenset:
+    padded = " " * (NGRAM - 1) + name.lower() + " "
+    return frozenset(padded[i : i + NGRAM] for i in range(len(padded) - NGRAM + 1))
+
+
+class NgramIndex:
+    """Candidates by n-gram, finds the most similar one to a name."""
+
+    def __init__(self, candidates: tuple[str, ...]):
+        self.candidates = candidates
+        self.sizes = [len(ngrams(candidate)) for candidate in candidates]
+        self.postings = collections.defaultdict(list)
+        for index, candidate in enumerate(candidates):
+            for gram in ngrams(candidate):
+                self.postings[gram].append(index)
+
+    def best(self, name: str) -> str | None:
+        """Candidate of highest Dice similarity, None if below MIN_SIMILARITY."""
+        grams = ngrams(name)
+        shared = collections.Counter()
+        for gram in grams:
+            shared.update(self.postings.get(gram, ()))
+        best, similarity = None, 0.0
+        # Ties go to the earlier candidate, as the specification lists them
+        for index in sorted(shared):
+            score = 2 * shared[index] / (len(grams) + self.sizes[index])
+            if score > similarity:
+                best, similarity = self.candidates[index], score
+        return best if similarity >= MIN_SIMILARITY else None
+
+
+class Spec:
+    """Hierarchy of parts of a product category compiled into lookup tables.
+
+    parents maps every part to its parent and labels the parts that get an
+    assignment button to their label. children maps every group to its
+    allowed child names in spec order and allowed to the same names as a
+    frozenset. groups are the parts with children of their own. budgets,
+    dimensions and prototypes are the optional sections, empty when missing.
+    """
+
+    __slots__ = (
+        "category",
+        "version",
+        "root",
+        "parents",
+        "labels",
+        "order",
+        "index",
+        "children",
+        "allowed",
+        "groups",
+        "obligatory",
+        "pivots",
+        "protected",
+        "budgets",
+        "dimensions",
+        "prototypes",
+        "_indices",
+    )
+
+    def __init__(self, data: dict):
+        if data.get("version", 0) > SPEC_VERSION:
+            raise ValueError(f"Unsupported spec version {data['version']}")
+        self.category = data["category"]
+        self.version = data.get("version", SPEC_VERSION)
+        self.root = data["root"]
+        self.parents = {part["name"]: part["parent"] for part in data["parts"]}
+        self.labels = {
+            part["name"]: part["label"] for part in data["parts"] if "label" in part
+        }
+        self.order = hierarchy_order(self.parents)
+        self.index = {name: index for index, name in enumerate(self.order)}
+        children = {}
+        for name in self.parents:
+            children.setdefault(self.parents[name], []).append(name)
+        self.children = {group: tuple(names) for group, names in children.items()}
+        self.allowed = {
+            group: frozenset(names) for group, names in self.children.items()
+        }
+        self.groups = frozenset(self.children)
+        self.obligatory = frozenset(data.get("obligatory", ()))
+        self.pivots = frozenset(data.get("pivots", ()))
+        self.protected = frozenset(data.get("protected", ()))
+        self.budgets = data.get("budgets", {})
+        self.dimensions = data.get("dimensions", {})
+        self.prototypes = data.get("prototypes", {})
+        self._indices = {}
+
+    def suggest(self, name: str, group: str) -> str | None:
+        """Allowed child of group closest to name, None if none is close."""
+        return _suggest(self, name, group)
+
+    def ngram_index(self, group: str) -> NgramIndex:
+        if group not in self._indices:
+            self._indices[group] = NgramIndex(self.children[group])
+        return self._indices[group]
+
+    def button_rows(self) -> list[tuple[str | None, str]]:
+        """(part, label) of the assignment buttons, (None, label) for headers.
+
+        Every group with labelled parts gets a header with its label.
+        """
+        rows = []
+        for group, names in self.children.items():
+            labelled = [
+                name
+                for name in names
+                if name in self.labels and name not in self.groups
+            ]
+            if labelled:
+                rows.append((None, self.labels.get(group, group)))
+                rows.extend((name, self.labels[name]) for name in labelled)
+        return rows
+
+
+@functools.lru_cache(maxsize=4096)
+def _suggest(spec: Spec, name: str, group: str) -> str | None:
+    return spec.ngram_index(group).best(name)
+
+
+def categories() -> list[str]:
+    """Product categories with a spec file."""
+    return sorted(
+        os.path.splitext(file)[0]
+        for file in os.listdir(SPEC_DIR)
+        if file.endswith(".json")
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def load_spec(category: str = DEFAULT_CATEGORY) -> Spec:
+    """Spec of a product category, parsed and compiled once per process."""
+    with open(os.path.join(SPEC_DIR, f"{category}.json")) as file:
+        return Spec(json.load(file))
+
+
+SPEC = load_spec()
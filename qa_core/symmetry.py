@@ -0,0 +1,354 @@
+"""Left/right symmetry of the model, compared after reflecting across X."""
+import numpy as np
+
+from .grid import PointGrid
+from .model import MeshData, ModelSnapshot
+from .report import Report
+from .rules import cache_entry
+
+try:
+    from scipy.spatial import cKDTree
+except ImportError:
+    cKDTree = None
+
+SIDES = ("left", "right")
+# Largest allowed difference of mirrored transforms
+TRANSFORM_TOLERANCE = 1e-4
+# Largest allowed distance between mirrored surfaces, in meters
+DISTANCE_TOLERANCE = 0.0005
+REFLECT_X = np.diag([-1.0, 1.0, 1.0, 1.0])
+# Grids of GridNeighbours and growth of their cells from one to the next.
+# Coarser grids gather more candidates per query than the early break needs.
+GRID_LEVELS = 2
+GRID_GROWTH = 4
+# Queries and points compared at once by GridNeighbours.early_break
+BATCH_QUERIES = 512
+BATCH_POINTS = 4096
+# Queries per step of a search bounded by a limit, which stops after the step
+# that finds a distance above it
+BATCH_BOUNDED = 8192
+
+
+class GridNeighbours:
+    """Nearest neighbours from grids of growing cells, for Blender's Python.
+
+    The finest grid has about one cell per point along a surface, so mirrored
+    vertices are found in the block of their own cell. Queries whose nearest
+    point may lie outside the block move on to the next, coarser grid. Queries
+    left after GRID_LEVELS grids are compared to the points in random order,
+    a query is dropped as soon as it is closer to one than the largest
+    distance found so far.
+
+    A search bounded by a limit needs one grid of cells no smaller than the
+    limit: points within it of a query are all in the block of its cell.
+    """
+
+    def __init__(self, points: np.ndarray):
+        self.points = points
+        self.span = float(np.ptp(points, axis=0).max())
+        self.first_cell = self.span / np.sqrt(len(points))
+        self.grids = []
+        self.bounded_grids = {}
+        self.shuffled = np.random.default_rng(0).permutation(points)
+
+    def grid(self, level: int) -> PointGrid:
+        while len(self.grids) <= level:
+            cell = self.first_cell * GRID_GROWTH ** len(self.grids)
+            self.grids.append(PointGrid(self.points, cell))
+        return self.grids[level]
+
+    def max_distance(self, points: np.ndarray, limit: float | None = None) -> float:
+        """Largest distance from points to their nearest point of the grids.
+
+        With a limit, inf as soon as a distance above it is found.
+        """
+        if limit is not None:
+            return self.bounded_max_distance(points, limit)
+        largest = 0.0
+        remaining = points
+        bounds = np.zeros(len(points))
+        for level in range(GRID_LEVELS):
+            if not len(remaining):
+                break
+            grid = self.grid(level)
+            nearest = grid.nearest_candidates(remaining)
+            bounds = grid.block_distances(remaining)
+            found = nearest <= bounds
+            if found.any():
+                largest = max(largest, float(nearest[found].max()))
+            # A point with a candidate no farther than largest cannot raise it
+            keep = ~found & (nearest > largest)
+            remaining, bounds = remaining[keep], bounds[keep]
+        # Farthest first, so that largest grows early and drops more queries
+        remaining = remaining[np.argsort(-bounds)]
+        for start in range(0, len(remaining), BATCH_QUERIES):
+            largest = max(
+                largest,
+                self.early_break(remaining[start : start + BATCH_QUERIES], largest),
+            )
+        return largest
+
+    def bounded_max_distance(self, points: np.ndarray, limit: float) -> float:
+        cell = max(limit, self.first_cell)
+        if cell not in self.bounded_grids:
+            self.bounded_grids[cell] = PointGrid(self.points, cell)
+        grid = self.bounded_grids[cell]
+        largest = 0.0
+        for start in range(0, len(points), BATCH_BOUNDED):
+            nearest = grid.nearest_candidates(points[start : start + BATCH_BOUNDED])
+            largest = max(largest, float(nearest.max()))
+            if largest > limit:
+                return np.inf
+        return largest
+
+    def early_break(self, queries: np.ndarray, largest: float) -> float:
+        """Largest nearest distance of queries, or largest if not above it."""
+        nearest = np.full(len(queries), np.inf)
+        squared_queries = np.einsum("ij,ij->i", queries, queries)
+        for start in range(0, len(self.shuffled), BATCH_POINTS):
+            chunk = self.shuffled[start : start + BATCH_POINTS]
+            squared = (
+                squared_queries[:, None]
+                + np.einsum("ij,ij->i", chunk, chunk)
+                - 2 * queries @ chunk.T
+            )
+            nearest = np.minimum(nearest, np.sqrt(np.maximum(squared.min(axis=1), 0)))
+            keep = nearest > largest
+            if not keep.any():
+                return largest
+            queries, nearest = queries[keep], nearest[keep]
+            squared_queries = squared_queries[keep]
+        return float(nearest.max())
+
+
+class NearestNeighbours:
+    """KD-tree over a point array from SciPy, grids of cells without it."""
+
+    def __init__(self, points: np.ndarray):
+        if cKDTree is not None:
+            self.tree = cKDTree(points)
+        else:
+            self.tree = GridNeighbours(points)
+
+    def max_distance(self, points: np.ndarray, limit: float | None = None) -> float:
+        """Largest distance from points to their nearest neighbour.
+
+        With a limit, the search may stop at the first distance above it and
+        returns inf then.
+        """
+        if cKDTree is None:
+            return self.tree.max_distance(points, limit)
+        if limit is None:
+            return float(self.tree.query(points, workers=-1)[0].max())
+        distances = self.tree.query(points, distance_upper_bound=limit, workers=-1)[0]
+        return float(distances.max())
+
+
+def mesh_trees(snapshot: ModelSnapshot, nodes: set, cache: dict | None) -> dict:
+    """NearestNeighbours of the vertices of the meshes of nodes, by mesh.
+
+    With a cache, trees are stored with the fingerprint of their mesh in the
+    entry of its first node and only built again when the mesh changed.
+    """
+    first = snapshot.mesh_nodes()
+    trees = {}
+    for index in nodes:
+        mesh = snapshot.meshes[index]
+        if mesh is None or mesh in trees or mesh.num_vertices == 0:
+            continue
+        vertices = np.asarray(mesh.vertices, dtype=np.float64)
+        if cache is None or mesh not in first:
+            trees[mesh] = NearestNeighbours(vertices)
+            continue
+        entry = cache_entry(cache, snapshot.keys[first[mesh]], mesh.fingerprint())
+        if "tree" not in entry:
+            entry["tree"] = NearestNeighbours(vertices)
+        trees[mesh] = entry["tree"]
+    return trees
+
+
+def transform_points(matrix: np.ndarray, points: np.ndarray) -> np.ndarray:
+    return points @ matrix[:3, :3].T + matrix[:3, 3]
+
+
+def mirrored_distance(
+    mesh: MeshData,
+    world: np.ndarray,
+    other_tree: NearestNeighbours,
+    other_world: np.ndarray,
+    limit: float | None = None,
+) -> float:
+    """Largest distance from the reflected vertices of mesh to other's vertices.
+
+    Points are brought into the local space of other, where its tree lives;
+    distances stay world distances as long as other is not scaled. With a
+    limit, inf once a distance above it is found.
+    """
+    to_other = np.linalg.inv(other_world) @ REFLECT_X @ world
+    points = transform_points(to_other, np.asarray(mesh.vertices, dtype=np.float64))
+    return other_tree.max_distance(points, limit)
+
+
+def symmetric_pairs(snapshot: ModelSnapshot) -> tuple[list, list]:
+    """Index pairs of left and right nodes, and left/right nodes without a pair."""
+    index_of = {name: index for index, name in enumerate(snapshot.names)}
+    pairs = []
+    unpaired = []
+    for index, name in enumerate(snapshot.names):
+        tokens = name.split("_")
+        if "left" in tokens:
+            other = "_".join("right" if token == "left" else token for token in tokens)
+        elif "right" in tokens:
+            other = "_".join("left" if token == "right" else token for token in tokens)
+            if other in index_of:
+                continue
+        else:
+            continue
+        if other in index_of:
+            pairs.append((index, index_of[other]))
+        else:
+            unpaired.append(index)
+    return pairs, unpaired
+
+
+def pair_distance(
+    snapshot: ModelSnapshot,
+    left: int,
+    right: int,
+    world: np.ndarray,
+    trees: dict,
+) -> float:
+    """Largest distance between the mirrored meshes of left and right.
+
+    inf when above DISTANCE_TOLERANCE, the search stops there.
+    """
+    mesh, other = snapshot.meshes[left], snapshot.meshes[right]
+    distance = mirrored_distance(
+        mesh, world[left], trees[other], world[right], DISTANCE_TOLERANCE
+    )
+    if distance > DISTANCE_TOLERANCE:
+        return distance
+    return max(
+        distance,
+        mirrored_distance(
+            other, world[right], trees[mesh], world[left], DISTANCE_TOLERANCE
+        ),
+    )
+
+
+def pair_distances(
+    snapshot: ModelSnapshot, pairs: list, world: np.ndarray, cache: dict | None
+) -> dict:
+    """pair_distance() of every pair of nodes with vertices, by pair.
+
+    With a cache, a distance is stored in the entry of the left node, keyed by
+    the fingerprints of both meshes and both world matrices.
+    """
+    distances = {}
+    keys = {}
+    for left, right in pairs:
+        mesh, other = snapshot.meshes[left], snapshot.meshes[right]
+        if mesh is None or other is None:
+            continue
+        if mesh.num_vertices == 0 or other.num_vertices == 0:
+            continue
+        if cache is None:
+            distances[left, right] = None
+            continue
+        entry = cache_entry(cache, snapshot.keys[left], mesh.fingerprint())
+        key = (other.fingerprint(), world[left].tobytes(), world[right].tobytes())
+        cached = entry.get("symmetry")
+        distances[left, right] = cached[1] if cached and cached[0] == key else None
+        keys[left, right] = (entry, key)
+
+    missing = [pair for pair, distance in distances.items() if distance is None]
+    trees = mesh_trees(snapshot, {index for pair in missing for index in pair}, cache)
+    for left, right in missing:
+        distances[left, right] = pair_distance(snapshot, left, right, world, trees)
+        if cache is not None:
+            entry, key = keys[left, right]
+            entry["symmetry"] = (key, distances[left, right])
+    return distances
+
+
+def check_symmetry(
+    snapshot: ModelSnapshot, report: Report, cache: dict | None = None
+):
+    pairs, unpaired = symmetric_pairs(snapshot)
+    names = snapshot.names
+    world = snapshot.world_matrices()
+    distances = pair_distances(snapshot, pairs, world, cache)
+    errors = []
+    for index in unpaired:
+        report.add(
+            "WARNING",
+            "symmetry",
+            f'No mirrored counterpart of "{names[index]}"',
+            names[index],
+        )
+
+    for left, right in pairs:
+        pair = f'"{names[left]}" and "{names[right]}"'
+        mirror_mesh = f'Mirror the mesh of "{names[left]}" onto "{names[right]}"'
+        mirrored = REFLECT_X @ snapshot.matrices[left] @ REFLECT_X
+        if np.abs(mirrored - snapshot.matrices[right]).max() > TRANSFORM_TOLERANCE:
+            errors.append(
+                (
+                    names[left],
+                    f"Transforms of {pair} are not mirrored",
+                    None,
+                    None,
+                    f'Mirror the transform of "{names[left]}" onto'
+                    f' "{names[right]}"',
+                )
+            )
+
+        mesh, other = snapshot.meshes[left], snapshot.meshes[right]
+        if mesh is None or other is None:
+            if mesh is not other:
+                errors.append(
+                    (
+                        names[left],
+                        f"Only one of {pair} is a mesh",
+                        None,
+                        None,
+                        f"Make both of {pair} meshes, or neither",
+                    )
+                )
+            continue
+        if mesh.num_vertices != other.num_vertices:
+            errors.append(
+                (
+                    names[left],
+                    f"Vertex counts of {pair} differ:"
+                    f" {mesh.num_vertices} != {other.num_vertices}",
+                    mesh.num_vertices,
+                    other.num_vertices,
+                    mirror_mesh,
+                )
+            )
+        distance = distances.get((left, right))
+        if distance is not None and distance > DISTANCE_TOLERANCE:
+            errors.append(
+                (
+                    names[left],
+                    f"Meshes of {pair} are not mirrored,"
+                    f" distance > {DISTANCE_TOLERANCE * 1000:.2f} mm",
+                    None,
+                    DISTANCE_TOLERANCE,
+                    mirror_mesh,
+                )
+            )
+
+    for node, error, value, threshold, fix in errors:
+        report.add(
+            "ERROR",
+            "symmetry",
+            error,
+            node,
+            value=value,
+            threshold=threshold,
+            fix=fix,
+        )
+    if pairs and not errors:
+        report.add("PASSED", "symmetry", "Left and right parts are mirrored")
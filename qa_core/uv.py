@@ -0,0 +1,225 @@
+"""UV layout analysis of the first UV map of every mesh.
+
+Overlaps are found by rasterizing the UV triangles into an occupancy grid:
+every grid cell whose center lies in a triangle counts it, and cells counted
+by two or more triangles are overlapping UV area. Cell centers on a triangle
+edge belong to neither triangle, so neighbouring triangles of an island
+never overlap.
+"""
+import numpy as np
+
+from .model import MeshData, ModelSnapshot
+from .report import Report
+from .rules import cache_entry
+
+GRID_SIZE = 512
+MIN_GRID_SIZE = 8
+# Cells tested at once while rasterizing, bounds the temporary arrays
+MAX_SAMPLES = 1 << 22
+# Cells tested per mesh, the grid gets coarser for layouts of large triangles
+MAX_TOTAL_SAMPLES = 1 << 21
+# Cell centers closer to an edge belong to neither triangle, so rounding does
+# not make neighbouring triangles overlap
+EDGE_EPSILON = 1e-6
+# Warning thresholds, fractions of the UV corners, the covered UV area and
+# the mean texel density
+MAX_OUTSIDE = 0.01
+MAX_OVERLAP = 0.005
+MAX_DENSITY_VARIATION = 0.5
+
+
+def grid_size(uv_triangles: np.ndarray) -> int:
+    """Finest grid up to GRID_SIZE testing at most MAX_TOTAL_SAMPLES cells."""
+    clipped = np.clip(uv_triangles, 0, 1)
+    extents = clipped.max(axis=1) - clipped.min(axis=1)
+    area = float(np.sum(extents[:, 0] * extents[:, 1]))
+    if area * GRID_SIZE**2 <= MAX_TOTAL_SAMPLES:
+        return GRID_SIZE
+    return max(int(np.sqrt(MAX_TOTAL_SAMPLES / area)), MIN_GRID_SIZE)
+
+
+def edge_functions(points: np.ndarray) -> np.ndarray:
+    """(T, 3, 3) coefficients a, b, c of the edges of (T, 3, 2) triangles.
+
+    a * x + b * y + c is positive for points left of an edge, the edges are
+    oriented so that the inside of every triangle is left of all of them.
+    """
+    start = points
+    end = np.roll(points, -1, axis=1)
+    a = start[..., 1] - end[..., 1]
+    b = end[..., 0] - start[..., 0]
+    c = -(a * start[..., 0] + b * start[..., 1])
+    coefficients = np.stack([a, b, c], axis=2)
+    u, v = points[:, 1] - points[:, 0], points[:, 2] - points[:, 0]
+    clockwise = u[:, 0] * v[:, 1] - u[:, 1] * v[:, 0] < 0
+    coefficients[clockwise] *= -1
+    return coefficients
+
+
+def occupancy(uv_triangles: np.ndarray, size: int = GRID_SIZE) -> np.ndarray:
+    """Number of triangles covering every cell of a size x size grid on [0, 1]."""
+    counts = np.zeros(size * size, dtype=np.int32)
+    points = uv_triangles * size - 0.5
+    coefficients = edge_functions(points)
+    low = np.clip(np.ceil(points.min(axis=1)), 0, size).astype(np.int64)
+    high = np.clip(np.floor(points.max(axis=1)), -1, size - 1).astype(np.int64)
+    widths = np.maximum(high[:, 0] - low[:, 0] + 1, 0)
+    cells = widths * np.maximum(high[:, 1] - low[:, 1] + 1, 0)
+
+    start = 0
+    ends = np.cumsum(cells)
+    while start < len(cells):
+        # Triangles whose cells fit into one chunk, at least one triangle
+        base = ends[start - 1] if start > 0 else 0
+        stop = int(np.searchsorted(ends, base + MAX_SAMPLES, "right"))
+        stop = max(stop, start + 1)
+        chunk = np.arange(start, stop)
+        start = stop
+        n = cells[chunk]
+        if n.sum() == 0:
+            continue
+        triangle = np.repeat(chunk, n)
+        local = np.arange(n.sum()) - np.repeat(np.cumsum(n) - n, n)
+        x = low[triangle, 0] + local % widths[triangle]
+        y = low[triangle, 1] + local // widths[triangle]
+
+        edges = coefficients[triangle]
+        values = edges[..., 0] * x[:, None] + edges[..., 1] * y[:, None]
+        inside = np.all(values + edges[..., 2] > EDGE_EPSILON, axis=1)
+        counts += np.bincount(
+            (y * size + x)[inside], minlength=size * size
+        ).astype(np.int32)
+    return counts
+
+
+def triangle_areas(points: np.ndarray) -> np.ndarray:
+    """Areas of (T, 3, 2) or (T, 3, 3) triangles."""
+    u, v = points[:, 1] - points[:, 0], points[:, 2] - points[:, 0]
+    if points.shape[2] == 2:
+        return np.abs(u[:, 0] * v[:, 1] - u[:, 1] * v[:, 0]) / 2
+    return np.linalg.norm(np.cross(u, v), axis=1) / 2
+
+
+def uv_statistics(mesh: MeshData, uv: np.ndarray) -> dict:
+    """Coverage, out-of-[0,1] ratio, overlap and texel density variation.
+
+    Coverage and overlap are fractions of the [0, 1] UV square, outside the
+    fraction of UV corners outside of it, and density_variation the area
+    weighted coefficient of variation of sqrt(UV area / surface area).
+    """
+    corners = mesh.corner_triangles()
+    uv_triangles = uv[corners].astype(np.float64)
+    counts = occupancy(uv_triangles, grid_size(uv_triangles))
+
+    positions = mesh.vertices[mesh.loop_vertices[corners]].astype(np.float64)
+    surface = triangle_areas(positions)
+    valid = surface > 1e-12
+    density = np.sqrt(triangle_areas(uv_triangles)[valid] / surface[valid])
+    weights = surface[valid]
+    variation = 0.0
+    if weights.sum() > 0:
+        mean = np.average(density, weights=weights)
+        if mean > 0:
+            deviation = np.sqrt(np.average((density - mean) ** 2, weights=weights))
+            variation = deviation / mean
+
+    outside = np.any((uv < 0) | (uv > 1), axis=1)
+    return {
+        "coverage": float(np.count_nonzero(counts) / counts.size),
+        "outside": float(outside.mean()) if len(uv) else 0.0,
+        "overlap": float(np.count_nonzero(counts > 1) / counts.size),
+        "density_variation": float(variation),
+    }
+
+
+def mesh_uv_statistics(
+    snapshot: ModelSnapshot, mesh: MeshData, index: int, cache: dict | None
+) -> tuple[dict, int]:
+    """uv_statistics() of the first UV map of mesh and its triangles.
+
+    With a cache, they are stored with the fingerprint of the mesh and the
+    name of the UV map in the entry of its first node, index, and only
+    computed again when either changed.
+    """
+    name = mesh.uv_layer_names[0]
+    entry = None
+    if cache is not None:
+        entry = cache_entry(cache, snapshot.keys[index], mesh.fingerprint())
+        cached = entry.get("uv_statistics")
+        if cached is not None and cached[0] == name:
+            return cached[1], cached[2]
+    stats = uv_statistics(mesh, mesh.uv_layers[name])
+    triangles = int(np.sum(np.maximum(mesh.loop_totals - 2, 0)))
+    if entry is not None:
+        entry["uv_statistics"] = (name, stats, triangles)
+    return stats, triangles
+
+
+def check_uv_layout(
+    snapshot: ModelSnapshot, report: Report, cache: dict | None = None
+) -> int:
+    """Check the first UV map of every mesh, returns the triangles analysed.
+
+    cache keeps the statistics of unchanged meshes, see mesh_uv_statistics.
+    """
+    warnings = 0
+    triangles = 0
+    nodes = snapshot.mesh_nodes()
+    for mesh, index in nodes.items():
+        node = snapshot.names[index]
+        if not mesh.uv_layer_names:
+            report.add(
+                "WARNING",
+                "uv_layout",
+                f'Mesh of "{node}" has no UV map',
+                node,
+                fix="Unwrap the mesh (UV > Unwrap)",
+            )
+            warnings += 1
+            continue
+        stats, mesh_triangles = mesh_uv_statistics(snapshot, mesh, index, cache)
+        triangles += mesh_triangles
+        report.add(
+            "INFO",
+            "uv_layout",
+            f'UV of "{node}": coverage {stats["coverage"]:.0%},'
+            f' outside {stats["outside"]:.1%}, overlap {stats["overlap"]:.1%},'
+            f' texel density variation {stats["density_variation"]:.0%}',
+            node,
+            value=stats,
+        )
+        for name, limit, message, fix in (
+            (
+                "outside",
+                MAX_OUTSIDE,
+                "UVs outside of [0, 1]",
+                "Scale and move the islands into the UV square",
+            ),
+            (
+                "overlap",
+                MAX_OVERLAP * stats["coverage"],
+                "Overlapping UV islands",
+                "Separate the islands (UV > Pack Islands)",
+            ),
+            (
+                "density_variation",
+                MAX_DENSITY_VARIATION,
+                "Uneven texel density",
+                "Average the island scales (UV > Average Islands Scale)",
+            ),
+        ):
+            if stats[name] > limit:
+                report.add(
+                    "WARNING",
+                    "uv_layout",
+                    f'{message} in "{node}": {stats[name]:.1%}',
+                    node,
+                    value=stats[name],
+                    threshold=limit,
+                    fix=fix,
+                )
+                warnings += 1
+
+    if nodes and warnings == 0:
+        report.add("PASSED", "uv_layout", "UV layouts without overlaps or outliers")
+    return triangles
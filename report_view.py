@@ -0,0 +1,181 @@
+"""QA report in the sidebar as a filterable, scrolling UIList.
+
+The findings of a report are copied once into a collection of the window
+manager. The list draws only the rows that are scrolled into view, and the
+severity filter, search and grouping are computed once per change of the
+filter settings instead of on every redraw. Its filter options are only the
+search: grouping orders the list and the severity toggles select rows, so
+the UIList's invert and sort toggles are not drawn.
+"""
+import bpy
+
+from . import addon_updater_ops
+from .qa_core.report import Report
+
+SEVERITY_ICONS = {
+    "ERROR": "CANCEL",
+    "WARNING": "ERROR",
+    "INFO": "INFO",
+    "PASSED": "CHECKMARK",
+}
+ROWS = 12
+
+# Findings shown in the list, in the order of the collection, their number
+# by severity and a counter of set_report calls
+_findings: list = []
+_counts: dict = {}
+_generation = 0
+# Filter settings and the flags and order computed for them
+_filtered = (None, [], [])
+
+
+class ShopAR_ReportRow(bpy.types.PropertyGroup):
+    severity = bpy.props.StringProperty()
+    rule = bpy.props.StringProperty()
+    node = bpy.props.StringProperty()
+    message = bpy.props.StringProperty()
+    fix = bpy.props.StringProperty()
+
+
+class SHOPAR_UL_report(bpy.types.UIList):
+    def draw_item(
+        self, context, layout, data, item, icon, active_data, active_propname, index
+    ):
+        group = context.window_manager.shopar_report_group
+        if group == "NONE":
+            layout.label(text=item.message, icon=SEVERITY_ICONS[item.severity])
+            return
+        split = layout.split(factor=0.3)
+        split.label(text=item.rule if group == "RULE" else item.node)
+        split.label(text=item.message, icon=SEVERITY_ICONS[item.severity])
+
+    def draw_filter(self, context, layout):
+        layout.prop(self, "filter_name", text="", icon="VIEWZOOM")
+
+    def filter_items(self, context, data, propname):
+        global _filtered
+        wm = context.window_manager
+        severities = {
+            severity
+            for severity in SEVERITY_ICONS
+            if getattr(wm, f"shopar_report_show_{severity.lower()}")
+        }
+        key = (
+            _generation,
+            frozenset(severities),
+            self.filter_name.lower(),
+            wm.shopar_report_group,
+        )
+        if _filtered[0] == key:
+            return _filtered[1], _filtered[2]
+
+        search = self.filter_name.lower()
+        flags = [
+            self.bitflag_filter_item
+            if finding.severity in severities
+            and (
+                not search
+                or search in finding.message.lower()
+                or search in finding.node.lower()
+                or search in finding.rule
+            )
+            else 0
+            for finding in _findings
+        ]
+        order = []
+        if wm.shopar_report_group != "NONE":
+            attribute = "rule" if wm.shopar_report_group == "RULE" else "node"
+            ranked = sorted(
+                range(len(_findings)),
+                key=lambda index: getattr(_findings[index], attribute),
+            )
+            order = [0] * len(_findings)
+            for position, index in enumerate(ranked):
+                order[index] = position
+        _filtered = (key, flags, order)
+        return flags, order
+
+
+def set_report(window_manager: bpy.types.WindowManager, report: Report):
+    """Copy the findings of report into the list, once per report."""
+    global _findings, _counts, _generation
+    rows = window_manager.shopar_report_rows
+    rows.clear()
+    for finding in report.findings:
+        row = rows.add()
+        row.severity = finding.severity
+        row.rule = finding.rule
+        row.node = finding.node
+        row.message = finding.message
+        row.fix = finding.fix
+    window_manager.shopar_report_index = 0
+    _findings = list(report.findings)
+    _counts = report.counts()
+    _generation += 1
+
+
+def draw_report(layout, context: bpy.types.Context):
+    wm = context.window_manager
+    row = layout.row(align=True)
+    for severity, icon in SEVERITY_ICONS.items():
+        row.prop(
+            wm,
+            f"shopar_report_show_{severity.lower()}",
+            text=str(_counts.get(severity, 0)),
+            icon=icon,
+            toggle=True,
+        )
+    layout.prop(wm, "shopar_report_group", expand=True)
+    layout.template_list(
+        "SHOPAR_UL_report",
+        "",
+        wm,
+        "shopar_report_rows",
+        wm,
+        "shopar_report_index",
+        rows=ROWS,
+    )
+    rows = wm.shopar_report_rows
+    if 0 <= wm.shopar_report_index < len(rows) and rows[wm.shopar_report_index].fix:
+        layout.label(text=rows[wm.shopar_report_index].fix, icon="TOOL_SETTINGS")
+
+
+classes = [ShopAR_ReportRow, SHOPAR_UL_report]
+
+
+def register():
+    for cls in classes:
+        addon_updater_ops.make_annotations(cls)
+        bpy.utils.register_class(cls)
+    wm = bpy.types.WindowManager
+    wm.shopar_report_rows = bpy.props.CollectionProperty(type=ShopAR_ReportRow)
+    wm.shopar_report_index = bpy.props.IntProperty()
+    wm.shopar_report_group = bpy.props.EnumProperty(
+        name="Group by",
+        items=[
+            ("NONE", "Order", "Keep the order of the checks"),
+            ("RULE", "Rule", "Group the findings by rule"),
+            ("NODE", "Node", "Group the findings by node"),
+        ],
+    )
+    for severity in SEVERITY_ICONS:
+        setattr(
+            wm,
+            f"shopar_report_show_{severity.lower()}",
+            bpy.props.BoolProperty(
+                name=severity.capitalize(),
+                description=f"Show {severity.lower()} findings",
+                default=True,
+            ),
+        )
+
+
+def unregister():
+    wm = bpy.types.WindowManager
+    for severity in SEVERITY_ICONS:
+        delattr(wm, f"shopar_report_show_{severity.lower()}")
+    del wm.shopar_report_group
+    del wm.shopar_report_index
+    del wm.shopar_report_rows
+    for cls in reversed(classes):
+        bpy.utils.unregister_class(cls)
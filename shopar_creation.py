@@ -1,75 +1,129 @@
 from typing import Set
+import functools
+import json
+import os
+import subprocess
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
 import bpy
-import bmesh
+import numpy as np
 
 from . import utils
 from . import shopar_qa
+from .qa_core.spec import SPEC, Spec, load_spec
 from mathutils import Vector
 
-hierarchy_parents = {
-    "frame": "Model",
-    "front_rim": "frame",
-    "nose_pad_left": "frame",
-    "nose_pad_right": "frame",
-    "hinge_frame_right": "frame",
-    "hinge_frame_left": "frame",
-    "nose_bridge": "frame",
-    "lenses": "Model",
-    "lens_left": "lenses",
-    "lens_right": "lenses",
-    "rim_left": "lenses",
-    "rim_right": "lenses",
-    "temples": "Model",
-    "temple_left": "temples",
-    "temple_right": "temples",
-    "temple_left_inner": "temple_left",
-    "temple_left_outer": "temple_left",
-    "temple_tip_inner_left": "temple_left",
-    "temple_tip_outer_left": "temple_left",
-    "hinge_temple_left": "temple_left",
-    "screw_left": "temple_left",
-    "temple_right_inner": "temple_right",
-    "temple_right_outer": "temple_right",
-    "temple_tip_inner_right": "temple_right",
-    "temple_tip_outer_right": "temple_right",
-    "hinge_temple_right": "temple_right",
-    "screw_right": "temple_right",
-}
+DECIMATE_MODIFIER = "ShopAR Decimate"
 
 
-def place_in_hierarchy(
-    obj, name: str, context: bpy.types.Context, report = None
+def hierarchy_ancestors(name: str, spec: Spec = SPEC) -> list[str]:
+    """Groups above a part up to and including the root, closest first."""
+    ancestors = []
+    while name in spec.parents:
+        name = spec.parents[name]
+        ancestors.append(name)
+    return ancestors
+
+
+def part_name(name: str) -> str:
+    """Part name of an object, without the ".001" suffix of duplicate names."""
+    base, _, suffix = name.rpartition(".")
+    return base if base and suffix.isdigit() else name
+
+
+def new_group_empty(name: str, context: bpy.types.Context) -> bpy.types.Object:
+    empty = bpy.data.objects.new(name, None)
+    context.scene.collection.objects.link(empty)
+
+    empty.empty_display_size = 0.2
+    empty.empty_display_type = "PLAIN_AXES"
+    empty.rotation_mode = "QUATERNION"
+    return empty
+
+
+def build_hierarchy(
+    assignments: list,
+    context: bpy.types.Context,
+    root=None,
+    report=None,
+    spec: Spec = SPEC,
 ) -> Set[str]:
-    if obj:
-        if name in hierarchy_parents:
-            obj.name = name
-            parent_name = hierarchy_parents[name]
-            parent_obj = bpy.data.objects.get(parent_name)
-            if parent_obj:
-                obj.parent = parent_obj
-            else:
-                frame_empty = bpy.data.objects.new(parent_name, None)
-                bpy.context.scene.collection.objects.link(frame_empty)
-
-                frame_empty.empty_display_size = 0.2
-                frame_empty.empty_display_type = "PLAIN_AXES"
-                frame_empty.rotation_mode = "QUATERNION"
-
-                place_in_hierarchy(frame_empty, parent_name, context, report)
-                obj.parent = frame_empty
-        else:
+    """Rename and parent a batch of (object, part) assignments at once.
+
+    Objects are indexed by name once, the groups missing above the assigned
+    parts are created in one pass, parents first. The root group is root when
+    given, otherwise the object named after the spec's root, created if
+    missing.
+    """
+    for obj, name in assignments:
+        if name not in spec.parents:
             if report:
                 report(
                     {"ERROR"},
                     f"Object '{name}' does not have a defined parent in the hierarchy",
                 )
             return {"CANCELLED"}
+
+    objects = {obj.name: obj for obj in bpy.data.objects}
+    if root is not None:
+        objects[spec.root] = root
+    for obj, name in assignments:
+        obj.name = name
+        objects[name] = obj
+
+    groups = {
+        ancestor
+        for _, name in assignments
+        for ancestor in hierarchy_ancestors(name, spec)
+    }
+    missing = sorted(
+        groups - objects.keys(), key=lambda name: spec.index.get(name, -1)
+    )
+    created = []
+    for name in missing:
+        objects[name] = new_group_empty(name, context)
+        if name in spec.parents:
+            created.append((objects[name], name))
+
+    for obj, name in created + list(assignments):
+        obj.parent = objects[spec.parents[name]]
+    return {"FINISHED"}
+
+
+def place_in_hierarchy(
+    obj, name: str, context: bpy.types.Context, report = None, spec: Spec = SPEC
+) -> Set[str]:
+    if obj:
+        return build_hierarchy([(obj, name)], context, report=report, spec=spec)
     else:
         if report:
             report({"ERROR"}, "No active object selected")
         return {"CANCELLED"}
 
-    return {"FINISHED"}
+
+def assembly_root(obj: bpy.types.Object, spec: Spec = SPEC):
+    """Root the parts of obj's model go under, None if that root is a part."""
+    root = utils.get_object_root(obj)
+    return None if part_name(root.name) in spec.parents else root
+
+
+def assemble_hierarchy(
+    objects: list,
+    context: bpy.types.Context,
+    root=None,
+    report=None,
+    spec: Spec = SPEC,
+) -> int:
+    """Place every object whose name is a part of the hierarchy, in one batch."""
+    assignments = []
+    for obj in objects:
+        name = part_name(obj.name)
+        if name in spec.parents and obj is not root:
+            assignments.append((obj, name))
+    if assignments:
+        build_hierarchy(assignments, context, root, report, spec)
+    return len(assignments)
 
 
 def move_temples(context: bpy.types.Context):
@@ -83,7 +137,7 @@ def move_temples(context: bpy.types.Context):
         obj = bpy.data.objects[f"temple_{side}"]
         obj.select_set(False)
         utils.cleanup_location(obj)
-        if len(shopar_qa.check_scale(obj, [])) > 0:
+        if len(shopar_qa.check_scale(shopar_qa.snapshot_object(obj), [])) > 0:
             return False
         if obj.location == global_bbox_center:
             continue
@@ -98,62 +152,433 @@ def move_temples(context: bpy.types.Context):
     bpy.ops.object.transform_apply(location=True)
     return True
 
-def mirrorObjToRight(obj: bpy.types.Object, context: bpy.types.Context):
+def flip_winding(mesh: bpy.types.Mesh):
+    """Reverse the corner order of every polygon, keeping its first corner."""
+    if hasattr(mesh, "flip_normals"):
+        mesh.flip_normals()
+        return
+
+    loop_starts = np.empty(len(mesh.polygons), dtype=np.int32)
+    loop_totals = np.empty(len(mesh.polygons), dtype=np.int32)
+    mesh.polygons.foreach_get("loop_start", loop_starts)
+    mesh.polygons.foreach_get("loop_total", loop_totals)
+    starts = np.repeat(loop_starts, loop_totals)
+    totals = np.repeat(loop_totals, loop_totals)
+    corners = np.arange(len(mesh.loops)) - starts
+    source = starts + (totals - corners) % totals
+
+    vertex_index = np.empty(len(mesh.loops), dtype=np.int32)
+    mesh.loops.foreach_get("vertex_index", vertex_index)
+    mesh.loops.foreach_set("vertex_index", vertex_index[source])
+    for layer in mesh.uv_layers:
+        uv = np.empty((len(mesh.loops), 2), dtype=np.float32)
+        layer.data.foreach_get("uv", uv.ravel())
+        layer.data.foreach_set("uv", uv[source].ravel())
+    mesh.update(calc_edges=True)
+
+
+def mirror_mesh_x(mesh: bpy.types.Mesh):
+    """Mirror a mesh across its local X axis, without leaving Object Mode."""
+    co = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+    mesh.vertices.foreach_get("co", co)
+    co[0::3] *= -1
+    mesh.vertices.foreach_set("co", co)
+    flip_winding(mesh)
+    mesh.update()
+
+
+def mirror_object(
+    obj: bpy.types.Object, context: bpy.types.Context, side: str, other_side: str
+):
     new_obj: bpy.types.Object = obj.copy()
-    new_obj.name = obj.name.replace('left', 'right')
+    new_obj.name = obj.name.replace(side, other_side)
     if obj.data:
         new_obj.data = obj.data.copy()
     new_obj.animation_data_clear()
     bpy.context.scene.collection.objects.link(new_obj)
     place_in_hierarchy(new_obj, new_obj.name, context)
     if new_obj.type == 'MESH':
-        active_obj =  bpy.context.active_object
-        bpy.context.view_layer.objects.active = new_obj
-        bpy.ops.object.mode_set(mode='EDIT')
-
-        me: bpy.types.Mesh = new_obj.data
-        bm = bmesh.from_edit_mesh(me)
-        for v in bm.verts:
-            v.co.x *= -1
-        bmesh.update_edit_mesh(me)
-        bpy.ops.object.mode_set(mode='OBJECT')
-        bpy.context.view_layer.objects.active = active_obj
-        
+        mirror_mesh_x(new_obj.data)
+
     new_obj.location = (-obj.location[0], obj.location[1], obj.location[2])
 
 
+def mirrorObjToRight(obj: bpy.types.Object, context: bpy.types.Context):
+    mirror_object(obj, context, 'left', 'right')
+
+
 def mirrorObjToLeft(obj: bpy.types.Object, context: bpy.types.Context):
-    new_obj: bpy.types.Object = obj.copy()
-    new_obj.name = obj.name.replace('right', 'left')
-    if obj.data:
-        new_obj.data = obj.data.copy()
-    new_obj.animation_data_clear()
-    bpy.context.scene.collection.objects.link(new_obj)
-    place_in_hierarchy(new_obj, new_obj.name, context)
-    if new_obj.type == 'MESH':
-        active_obj =  bpy.context.active_object
-        bpy.context.view_layer.objects.active = new_obj
-        bpy.ops.object.mode_set(mode='EDIT')
-
-        me: bpy.types.Mesh = new_obj.data
-        bm = bmesh.from_edit_mesh(me)
-        for v in bm.verts:
-            v.co.x *= -1
-        bmesh.update_edit_mesh(me)
-        bpy.ops.object.mode_set(mode='OBJECT')
-        bpy.context.view_layer.objects.active = active_obj
-        
-    new_obj.location = (-obj.location[0], obj.location[1], obj.location[2])
+    mirror_object(obj, context, 'right', 'left')
+
+
+def swap_side(name: str, side: str, other_side: str) -> str:
+    tokens = name.split("_")
+    return "_".join(other_side if token == side else token for token in tokens)
+
+
+def mirror_subtree(
+    context: bpy.types.Context, side: str, other_side: str, share_data: bool = True
+) -> bpy.types.Object:
+    """Copy the temple_<side> group and all its children to other_side at once.
+
+    Names are remapped side token by side token. With share_data, objects that
+    share a mesh share its mirrored copy too, otherwise every object gets its
+    own. Only the group itself is placed through the hierarchy; children keep
+    their parent relation among the copies.
+    """
+    root = bpy.data.objects[f"temple_{side}"]
+    children_of = {}
+    for obj in bpy.data.objects:
+        if obj.parent is not None:
+            children_of.setdefault(obj.parent, []).append(obj)
+    objects = [root]
+    for obj in objects:
+        objects.extend(children_of.get(obj, []))
+
+    collection = context.scene.collection
+    copies = {}
+    mirrored_data = {}
+    for obj in objects:
+        new_obj = obj.copy()
+        new_obj.name = swap_side(obj.name, side, other_side)
+        new_obj.animation_data_clear()
+        if obj.data is not None:
+            key = obj.data if share_data else new_obj
+            if key not in mirrored_data:
+                mirrored_data[key] = obj.data.copy()
+            new_obj.data = mirrored_data[key]
+        new_obj.location.x = -obj.location.x
+        if obj.rotation_mode == "QUATERNION":
+            new_obj.rotation_quaternion.y = -obj.rotation_quaternion.y
+            new_obj.rotation_quaternion.z = -obj.rotation_quaternion.z
+        elif obj.rotation_mode != "AXIS_ANGLE":
+            new_obj.rotation_euler.y = -obj.rotation_euler.y
+            new_obj.rotation_euler.z = -obj.rotation_euler.z
+        collection.objects.link(new_obj)
+        copies[obj] = new_obj
+
+    for obj in objects[1:]:
+        copies[obj].parent = copies[obj.parent]
+    place_in_hierarchy(copies[root], copies[root].name, context)
 
+    for data in mirrored_data.values():
+        if isinstance(data, bpy.types.Mesh):
+            mirror_mesh_x(data)
+    return copies[root]
+
+
+def mirrorLeftToRight(context: bpy.types.Context, share_data: bool = True):
+    mirror_subtree(context, "left", "right", share_data)
+
+
+def mirrorRightToLeft(context: bpy.types.Context, share_data: bool = True):
+    mirror_subtree(context, "right", "left", share_data)
+
+
+def world_bounds(objects: list) -> tuple[np.ndarray, np.ndarray]:
+    """Minimum and maximum corner of the world bounding box of every object."""
+    corners = np.array([obj.bound_box for obj in objects], dtype=np.float64)
+    matrices = np.array([obj.matrix_world for obj in objects], dtype=np.float64)
+    world = (
+        np.einsum("pij,pkj->pki", matrices[:, :3, :3], corners)
+        + matrices[:, None, :3, 3]
+    )
+    return world.min(axis=1), world.max(axis=1)
+
+
+def front_view_areas(objects: list) -> np.ndarray:
+    """Area of the world bounding box of every object seen from the front (XZ)."""
+    minimum, maximum = world_bounds(objects)
+    extents = maximum - minimum
+    return extents[:, 0] * extents[:, 2]
+
+
+def allocate_budget(budget: float, weights: np.ndarray, caps: np.ndarray) -> np.ndarray:
+    """Split budget proportionally to weights, never above the cap of a part."""
+    allocation = np.zeros(len(caps), dtype=np.float64)
+    free = np.ones(len(caps), dtype=bool)
+    weights = weights + 1e-9
+    while free.any() and budget > 0:
+        share = budget * weights[free] / weights[free].sum()
+        capped = np.flatnonzero(free)[share >= caps[free]]
+        if len(capped) == 0:
+            allocation[free] = share
+            break
+        allocation[capped] = caps[capped]
+        budget -= caps[capped].sum()
+        free[capped] = False
+    return allocation
+
+
+def decimate_mesh(obj: bpy.types.Object, ratio: float, depsgraph) -> bpy.types.Mesh:
+    """Mesh of obj decimated with a collapse Decimate modifier.
+
+    Other modifiers are hidden while evaluating so only the decimation is baked.
+    """
+    hidden = [m for m in obj.modifiers if m.show_viewport]
+    for modifier in hidden:
+        modifier.show_viewport = False
+    modifier = obj.modifiers.new(DECIMATE_MODIFIER, "DECIMATE")
+    modifier.decimate_type = "COLLAPSE"
+    modifier.ratio = ratio
+    modifier.use_collapse_triangulate = True
+
+    depsgraph.update()
+    mesh = bpy.data.meshes.new_from_object(obj.evaluated_get(depsgraph))
+
+    obj.modifiers.remove(modifier)
+    for modifier in hidden:
+        modifier.show_viewport = True
+    return mesh
+
+
+def decimate_in_workers(parts: list, ratios: list, jobs: int) -> list:
+    """Decimate parts in background Blender processes, returns the new meshes.
+
+    Every worker gets a chunk of the meshes through a temporary .blend library
+    and writes its results into another one that is appended back afterwards.
+    Raises RuntimeError with the end of its output when a worker fails.
+    """
+    worker_script = os.path.join(os.path.dirname(__file__), "decimate_worker.py")
+    with tempfile.TemporaryDirectory(prefix="shopar_decimate_") as directory:
+        chunks = []
+        for worker in range(jobs):
+            chunk = list(range(worker, len(parts), jobs))
+            if not chunk:
+                continue
+            source = os.path.join(directory, f"source_{worker}.blend")
+            result = os.path.join(directory, f"result_{worker}.blend")
+            bpy.data.libraries.write(source, {parts[i].data for i in chunk})
+            job = {
+                "source": source,
+                "result": result,
+                "meshes": [[parts[i].data.name, ratios[i]] for i in chunk],
+            }
+            job_path = os.path.join(directory, f"job_{worker}.json")
+            with open(job_path, "w") as job_file:
+                json.dump(job, job_file)
+            chunks.append((chunk, result, job_path))
+
+        def run(job_path):
+            command = [bpy.app.binary_path, "-b", "--factory-startup"]
+            command += ["--python-exit-code", "1", "--python", worker_script]
+            return subprocess.run(
+                command + ["--", job_path],
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.PIPE,
+                text=True,
+            )
+
+        with ThreadPoolExecutor(max_workers=jobs) as executor:
+            processes = list(
+                executor.map(run, [job_path for _, _, job_path in chunks])
+            )
+        for process in processes:
+            if process.returncode != 0:
+                output = process.stderr.strip().splitlines()
+                raise RuntimeError(
+                    f"Decimation worker exited with code {process.returncode}"
+                    + (f": {output[-1]}" if output else "")
+                )
+
+        meshes = [None] * len(parts)
+        for chunk, result, _ in chunks:
+            names = [parts[i].data.name for i in chunk]
+            with bpy.data.libraries.load(result) as (data_from, data_to):
+                data_to.meshes = names
+            for i, mesh in zip(chunk, data_to.meshes):
+                meshes[i] = mesh
+    return meshes
+
+
+def decimate_to_budget(
+    context: bpy.types.Context,
+    root: bpy.types.Object,
+    target: int,
+    jobs: int = 1,
+    spec: Spec = SPEC,
+) -> tuple[int, int]:
+    """Decimate the parts of the model under root to fit target triangles.
+
+    The target is spread over the parts of spec in proportion to their area
+    seen from the front, no part gets more than it has. The spec's protected
+    parts are left untouched, as are meshes they share with other parts, and
+    a mesh shared by several parts is decimated once for all of them. Returns
+    the number of triangles before and after, counted again with check_faces.
+    Raises RuntimeError when the protected parts alone reach the target.
+    """
+    snapshot = shopar_qa.snapshot_object(root)
+    node_triangles, _ = shopar_qa.checks.node_face_counts(snapshot)
+    before = int(node_triangles.sum())
+
+    users = {}
+    protected_meshes = set()
+    for obj, name, count in zip(snapshot.objects, snapshot.names, node_triangles):
+        if obj.type != "MESH" or count == 0:
+            continue
+        users.setdefault(obj.data, []).append((obj, int(count)))
+        if name in spec.protected or name not in spec.parents:
+            protected_meshes.add(obj.data)
+    protected = sum(
+        count for mesh in protected_meshes for _, count in users.pop(mesh)
+    )
+    if not users or before <= target:
+        return before, before
+    if protected >= target:
+        raise RuntimeError(
+            f"The protected parts alone have {protected} triangles, "
+            f"the budget of {target} leaves nothing for the other parts"
+        )
+
+    # Triangles of every mesh summed over its objects, as are their areas
+    objects = [obj for uses in users.values() for obj, _ in uses]
+    mesh_index = np.repeat(np.arange(len(users)), [len(u) for u in users.values()])
+    areas = np.bincount(mesh_index, weights=front_view_areas(objects))
+    triangles = np.array(
+        [sum(count for _, count in uses) for uses in users.values()],
+        dtype=np.float64,
+    )
+    allocation = allocate_budget(target - protected, areas, triangles)
+    ratios = allocation / triangles
+    decimated = [
+        (uses, ratio) for uses, ratio in zip(users.values(), ratios) if ratio < 1
+    ]
+
+    if bpy.app.background and jobs > 1:
+        meshes = decimate_in_workers(
+            [uses[0][0] for uses, _ in decimated], [r for _, r in decimated], jobs
+        )
+    else:
+        depsgraph = context.evaluated_depsgraph_get()
+        meshes = [
+            decimate_mesh(uses[0][0], ratio, depsgraph) for uses, ratio in decimated
+        ]
+    for (uses, _), mesh in zip(decimated, meshes):
+        old_mesh = uses[0][0].data
+        name = old_mesh.name
+        for obj, _ in uses:
+            obj.data = mesh
+        if old_mesh.users == 0:
+            bpy.data.meshes.remove(old_mesh)
+        mesh.name = name
+
+    after, _ = shopar_qa.check_faces(shopar_qa.snapshot_object(root))
+    return before, after
+
+
+# Objects closer than this to the middle, relative to the width, have no side
+MIDDLE_TOLERANCE = 0.03
+# Proposals whose feature distance is above this are dropped
+MAX_PROPOSAL_COST = 4.0
+
+
+def prototype_table(spec: Spec = SPEC) -> tuple[list[str], np.ndarray, np.ndarray]:
+    """Part names, side signs (+1 left, -1 right, 0 middle) and features.
+
+    The prototypes of spec give the typical placement of its parts, relative
+    to the width of the model: distance from the middle in X, distance behind
+    the front in Y, height above the middle in Z, then the extents in X, Y and
+    Z. Models look towards -Y and the wearer's left is +X. "{side}" in a part
+    name stands for both sides.
+    """
+    names, signs, features = [], [], []
+    for name, feature in spec.prototypes.items():
+        if "{side}" not in name:
+            names.append(name)
+            signs.append(0)
+            features.append(feature)
+            continue
+        for side, sign in (("left", 1), ("right", -1)):
+            names.append(name.format(side=side))
+            signs.append(sign)
+            features.append(feature)
+    return names, np.array(signs), np.array(features, dtype=np.float64)
+
+
+@functools.lru_cache(maxsize=None)
+def part_items(category: str) -> list[tuple[str, str, str]]:
+    """Enum items of the parts the spec of category has prototypes of."""
+    # Blender needs the strings of enum items kept alive, hence the cache
+    return [(name, name, "") for name in prototype_table(load_spec(category))[0]]
+
+
+def part_features(minimum: np.ndarray, maximum: np.ndarray) -> tuple:
+    """Side signs and placement features of world bounding boxes.
+
+    Positions are taken relative to the frame center, the middle of the whole
+    model in X and Z and its front in Y, and divided by the model width.
+    """
+    low, high = minimum.min(axis=0), maximum.max(axis=0)
+    width = max(high[0] - low[0], 1e-9)
+    centers = (minimum + maximum) / 2
+    relative = np.column_stack(
+        (
+            centers[:, 0] - (low[0] + high[0]) / 2,
+            centers[:, 1] - low[1],
+            centers[:, 2] - (low[2] + high[2]) / 2,
+        )
+    ) / width
+    signs = np.where(
+        np.abs(relative[:, 0]) < MIDDLE_TOLERANCE, 0, np.sign(relative[:, 0])
+    )
+    relative[:, 0] = np.abs(relative[:, 0])
+    extents = (maximum - minimum) / width
+    return signs, np.column_stack((relative, extents))
+
+
+def feature_costs(features: np.ndarray, prototypes: np.ndarray) -> np.ndarray:
+    """Distance of every object to every part prototype.
+
+    Positions are compared linearly, extents on a log scale so that a screw
+    and a temple differ as much as they look.
+    """
+    position = features[:, None, :3] - prototypes[None, :, :3]
+    extent = np.log(features[:, None, 3:] + 0.01) - np.log(
+        prototypes[None, :, 3:] + 0.01
+    )
+    return 10 * (position**2).sum(axis=2) + (extent**2).sum(axis=2)
+
+
+def propose_part_names(objects: list, spec: Spec = SPEC) -> list[tuple]:
+    """Propose a part of spec for every mesh object, all at once.
+
+    Bounding boxes are read in one pass and every object is compared to every
+    part prototype, then parts are handed out greedily, the closest match
+    first, each part at most once. Of a lens and rim on the same side the one
+    with more vertices becomes the rim. Returns (object, part) pairs ordered
+    like objects, for the objects that got a part.
+    """
+    objects = [obj for obj in objects if obj.type == "MESH"]
+    if not objects or not spec.prototypes:
+        return []
+    names, part_signs, prototypes = prototype_table(spec)
+    signs, features = part_features(*world_bounds(objects))
+    costs = feature_costs(features, prototypes)
+    wrong_side = (signs[:, None] != part_signs[None, :]) & (part_signs[None, :] != 0)
+    costs[wrong_side & (signs[:, None] != 0)] = np.inf
+    costs[costs > MAX_PROPOSAL_COST] = np.inf
+
+    proposals = {}
+    taken = set()
+    for flat in np.argsort(costs, axis=None):
+        index, part = np.unravel_index(flat, costs.shape)
+        if not np.isfinite(costs[index, part]):
+            break
+        if index in proposals or part in taken:
+            continue
+        proposals[index] = part
+        taken.add(part)
 
-def mirrorLeftToRight(context:bpy.types.Context):
-    left_temple_obj = bpy.data.objects['temple_left']
-    mirrorObjToRight(left_temple_obj, context)
-    for obj in left_temple_obj.children:
-        mirrorObjToRight(obj, context)
+    vertex_counts = np.array([len(obj.data.vertices) for obj in objects])
+    part_of = {names[part]: index for index, part in proposals.items()}
+    for side in ("left", "right"):
+        lens, rim = part_of.get(f"lens_{side}"), part_of.get(f"rim_{side}")
+        if lens is not None and rim is not None:
+            if vertex_counts[lens] > vertex_counts[rim]:
+                proposals[lens], proposals[rim] = proposals[rim], proposals[lens]
 
-def mirrorRightToLeft(context: bpy.types.Context):
-    right_temple_obj = bpy.data.objects['temple_right']
-    mirrorObjToLeft(right_temple_obj, context)
-    for obj in right_temple_obj.children:
-        mirrorObjToLeft(obj, context)
\ No newline at end of file
+    return [
+        (obj, names[proposals[index]])
+        for index, obj in enumerate(objects)
+        if index in proposals
+    ]
@@ -1,227 +1,342 @@
-from typing import Set
+"""Blender adapter of the bpy-free QA checks in qa_core."""
+import functools
+
 import bpy
-from mathutils import Vector, Matrix
-import difflib
+import numpy as np
+from bpy.app.handlers import persistent
 
 from . import utils
-
-allowed_groups = ["frame", "lenses", "temples"]
-temple_names = ["temple_left", "temple_right"]
-allowed_nodes = {
-    "frame": [
-        "front_rim",
-        "nose_pad_left",
-        "nose_pad_right",
-        "hinge_frame_right",
-        "hinge_frame_left",
-        "nose_bridge",
-    ],
-    "lenses": ["lens_left", "lens_right", "rim_left", "rim_right"],
-    "temples": {
-        "temple_left": [
-            "temple_left_inner",
-            "temple_left_outer",
-            "temple_tip_inner_left",
-            "temple_tip_outer_left",
-            "hinge_temple_left",
-            "screw_left",
-        ],
-        "temple_right": [
-            "temple_right_inner",
-            "temple_right_outer",
-            "temple_tip_inner_right",
-            "temple_tip_outer_right",
-            "hinge_temple_right",
-            "screw_right",
-        ],
-    },
-}
-obligatory_names = {
-    "frame",
-    "lenses",
-    "temples",
-    "temple_left",
-    "temple_right",
-    "front_rim",
-    # TODO add required nose pads
-    # "nose_pad_left",
-    # "nose_pad_right",
-    "lens_left",
-    "lens_right",
-    "temple_left_outer",
-    "temple_right_outer",
-}
-
-
-def check_names(obj: bpy.types.Object) -> list:
-    output = []
-    obligatory_names_left = set(obligatory_names)
-
-    def invalidate(name, possible):
-        fix = difflib.get_close_matches(name, possible, 1)
-        return f'Invalid name: "{name}"' + (
-            f', did you mean "{fix[0]}"?' if len(fix) > 0 else ""
+from .qa_core import checks
+from .qa_core.budget import RENDER_BUDGETS, render_budget, triangle_budget
+from .qa_core.checks import (
+    check_faces,
+    check_location,
+    check_names,
+    check_scale,
+    check_uv,
+    count_faces,
+    count_materials,
+)
+from .qa_core.model import MeshData, ModelSnapshot
+from .qa_core.report import Finding, Report
+from .qa_core.rules import RULES
+from .qa_core.spec import SPEC, Spec, categories, load_spec
+
+# PropertyGroup of the rule enable flags, created in register()
+RuleFlags = None
+# Geometry updates seen per mesh pointer, part of the mesh fingerprints.
+# Loading a file, undo and redo replace mesh data behind pointers that may be
+# reused, so they start a new epoch.
+_generations: dict = {}
+_epoch = 0
+
+
+@persistent
+def on_depsgraph_update(scene, depsgraph):
+    for update in depsgraph.updates:
+        if not update.is_updated_geometry:
+            continue
+        data = update.id.original
+        if isinstance(data, bpy.types.Object):
+            data = data.data
+        if isinstance(data, bpy.types.Mesh):
+            pointer = data.as_pointer()
+            _generations[pointer] = _generations.get(pointer, 0) + 1
+
+
+@persistent
+def on_data_replaced(*args):
+    global _epoch
+    _generations.clear()
+    _epoch += 1
+
+
+HANDLERS = [
+    (bpy.app.handlers.depsgraph_update_post, on_depsgraph_update),
+    (bpy.app.handlers.load_post, on_data_replaced),
+    (bpy.app.handlers.undo_post, on_data_replaced),
+    (bpy.app.handlers.redo_post, on_data_replaced),
+]
+
+
+class BlenderMesh(MeshData):
+    """MeshData of a Blender mesh, element arrays are read on first access."""
+
+    def __init__(self, mesh: bpy.types.Mesh):
+        self.mesh = mesh
+        self.name = mesh.name
+        self.materials = [
+            material.name if material is not None else None
+            for material in mesh.materials
+        ]
+
+    @functools.cached_property
+    def vertices(self) -> np.ndarray:
+        co = np.empty(len(self.mesh.vertices) * 3, dtype=np.float32)
+        self.mesh.vertices.foreach_get("co", co)
+        return co.reshape(-1, 3)
+
+    @functools.cached_property
+    def loop_totals(self) -> np.ndarray:
+        loop_totals = np.empty(len(self.mesh.polygons), dtype=np.int32)
+        self.mesh.polygons.foreach_get("loop_total", loop_totals)
+        return loop_totals
+
+    @functools.cached_property
+    def loop_vertices(self) -> np.ndarray:
+        loop_vertices = np.empty(len(self.mesh.loops), dtype=np.int32)
+        self.mesh.loops.foreach_get("vertex_index", loop_vertices)
+        return loop_vertices
+
+    @functools.cached_property
+    def material_indices(self) -> np.ndarray:
+        material_indices = np.empty(len(self.mesh.polygons), dtype=np.int32)
+        self.mesh.polygons.foreach_get("material_index", material_indices)
+        return material_indices
+
+    @functools.cached_property
+    def loop_normals(self) -> np.ndarray:
+        normals = np.zeros(len(self.mesh.loops) * 3, dtype=np.float32)
+        # Before Blender 4.1 corner normals need calc_normals_split(), which
+        # changes the mesh, so they are left out of the render cost there
+        if hasattr(self.mesh, "corner_normals"):
+            self.mesh.corner_normals.foreach_get("vector", normals)
+        return normals.reshape(-1, 3)
+
+    @functools.cached_property
+    def uv_layers(self) -> dict:
+        uv_layers = {}
+        for layer in self.mesh.uv_layers:
+            uv = np.empty(len(self.mesh.loops) * 2, dtype=np.float32)
+            layer.data.foreach_get("uv", uv)
+            uv_layers[layer.name] = uv.reshape(-1, 2)
+        return uv_layers
+
+    # Once materialized, sizes come from the arrays so checks running in other
+    # threads do not touch Blender data
+
+    @property
+    def num_vertices(self) -> int:
+        if "vertices" in self.__dict__:
+            return len(self.vertices)
+        return len(self.mesh.vertices)
+
+    @property
+    def num_polygons(self) -> int:
+        if "loop_totals" in self.__dict__:
+            return len(self.loop_totals)
+        return len(self.mesh.polygons)
+
+    @property
+    def num_loops(self) -> int:
+        if "loop_vertices" in self.__dict__:
+            return len(self.loop_vertices)
+        return len(self.mesh.loops)
+
+    @property
+    def uv_layer_names(self) -> list[str]:
+        if "uv_layers" in self.__dict__:
+            return list(self.uv_layers)
+        return [layer.name for layer in self.mesh.uv_layers]
+
+    def materialize(self):
+        super().materialize()
+        self._fingerprint = self.fingerprint()
+
+    def fingerprint(self) -> tuple:
+        """Element counts and the geometry updates seen of the mesh.
+
+        Every edit of the mesh, topology or not, is a geometry update, so no
+        array has to be read; loop_totals is then only read when the cached
+        face counts are stale. Once materialized, the fingerprint taken then
+        is returned.
+        """
+        if "_fingerprint" in self.__dict__:
+            return self._fingerprint
+        pointer = self.mesh.as_pointer()
+        return (
+            pointer,
+            _epoch,
+            _generations.get(pointer, 0),
+            self.num_vertices,
+            len(self.mesh.edges),
+            self.num_polygons,
+            self.num_loops,
         )
 
-    for group in obj.children:
-        obligatory_names_left.discard(group.name)
 
-        if group.name not in allowed_groups:
-            output.append(
-                invalidate(group.name, allowed_groups)
-                + f' Skipping the check of potential children of "{group.name}".'
-            )
+class BlenderSnapshot(ModelSnapshot):
+    """ModelSnapshot that also keeps the Blender object of every node."""
+
+    def __init__(self, objects: list, **kwargs):
+        super().__init__(**kwargs)
+        self.objects = objects
+
+
+def material_textures(materials) -> list[tuple[str, int, int]]:
+    """Name and size of the images used by image texture nodes of materials."""
+    images = {}
+    for material in materials:
+        if material is None or material.node_tree is None:
             continue
-        if group.name == "temples":
-            for temples_group in group.children:
-                obligatory_names_left.discard(temples_group.name)
-
-                if temples_group.name not in temple_names:
-                    output.append(
-                        invalidate(temples_group.name, temple_names)
-                        + f' Skipping the check of potential children of "{temples_group.name}".'
-                    )
-                    continue
-                for node in temples_group.children:
-                    obligatory_names_left.discard(node.name)
-
-                    if node.name not in allowed_nodes[group.name][temples_group.name]:
-                        if not node.name.startswith("misc_"):
-                            output.append(
-                                invalidate(
-                                    node.name,
-                                    allowed_nodes[group.name][temples_group.name],
-                                )
-                            )
-        else:
-            for node in group.children:
-                obligatory_names_left.discard(node.name)
-
-                if node.name not in allowed_nodes[group.name]:
-                    if not node.name.startswith("misc_"):
-                        output.append(invalidate(node.name, allowed_nodes[group.name]))
-
-    if len(obligatory_names_left) > 0:
-        for obligatory_name in obligatory_names_left:
-            output.append(f"Missing node {obligatory_name}")
-
-    return output
-
-
-def check_faces(obj) -> tuple[int, int]:
-    num_triangles_total = 0
-    num_ngons_total = 0
-
-    if obj.type == "MESH":
-        for poly in obj.data.polygons:
-            if len(poly.vertices) == 3:
-                num_triangles_total += 1
-            elif len(poly.vertices) > 3:
-                num_ngons_total += 1
-
-    for child in obj.children:
-        a, b = check_faces(child)
-        num_triangles_total += a
-        num_ngons_total += b
-
-    return num_triangles_total, num_ngons_total
-
-
-def count_materials(obj, unique_materials: Set) -> int:
-    # Recursively count materials in children
-    if obj.type == "MESH":
-        for slot in obj.material_slots:
-            if slot.material is not None:
-                unique_materials.add(slot.material)
-    else:
-        for child in obj.children:
-            count_materials(child, unique_materials)
-
-    return len(unique_materials)
-
-
-def check_scale(obj: bpy.types.Object, output: list) -> list:
-    for child in obj.children:
-        check_scale(child, output)
-    if obj.scale != Vector((1, 1, 1)):
-        output.append(f'Invalid scale {obj.scale} of object "{obj.name}"')
-    return output
-
-
-def check_location(obj: bpy.types.Object, output: list):
-    for child in obj.children:
-        check_location(child, output)
-    # if obj.location != Vector((0, 0, 0)) and obj.name not in temple_names:
-    #     output.append(f'2.1 Invalid location {obj.location} of object "{obj.name}"')
-    if obj.location == Vector((0, 0, 0)) and obj.name in temple_names:
-        output.append(f'Temple group "{obj.name}" location in world origin')
-    return output
-
-
-def check_uv(obj: bpy.types.Object, uv_maps: Set):
-    if obj.type == "MESH" and isinstance(obj.data, bpy.types.Mesh):
-        for uv_map in obj.data.uv_layers:
-            uv_maps.add(uv_map.name)
-    else:
-        for child in obj.children:
-            check_uv(child, uv_maps)
-
-    return len(uv_maps)
-
-
-def check_model(context: bpy.types.Context):
-    report = {"ERROR": [], "INFO": [], "WARNING": [], "PASSED": []}
-    obj = context.active_object
+        for node in material.node_tree.nodes:
+            if node.type == "TEX_IMAGE" and node.image is not None:
+                images[node.image] = tuple(node.image.size)
+    return [(image.name, *size) for image, size in images.items()]
+
+
+def snapshot_object(root: bpy.types.Object) -> BlenderSnapshot:
+    """Describe the hierarchy under root, with a single pass over the scene.
+
+    obj.children scans all objects on every access, so children are grouped by
+    parent once instead.
+    """
+    children_of = {}
+    for obj in bpy.data.objects:
+        if obj.parent is not None:
+            children_of.setdefault(obj.parent, []).append(obj)
+
+    objects = [root]
+    parents = [-1]
+    for index, obj in enumerate(objects):
+        for child in children_of.get(obj, []):
+            objects.append(child)
+            parents.append(index)
+
+    meshes = {}
+    for obj in objects:
+        if obj.type == "MESH" and obj.data not in meshes:
+            meshes[obj.data] = BlenderMesh(obj.data)
+
+    return BlenderSnapshot(
+        objects=objects,
+        names=[obj.name for obj in objects],
+        types=[obj.type for obj in objects],
+        parents=parents,
+        locations=[obj.location[:] for obj in objects],
+        scales=[obj.scale[:] for obj in objects],
+        matrices=[np.array(obj.matrix_local) for obj in objects],
+        meshes=[meshes[obj.data] if obj.type == "MESH" else None for obj in objects],
+        keys=[obj.as_pointer() for obj in objects],
+        textures=material_textures(
+            {slot.material for obj in objects for slot in obj.material_slots}
+        ),
+    )
+
+
+def scene_budget(scene: bpy.types.Scene) -> dict:
+    return triangle_budget(
+        scene.shopar_product_line, scene.shopar_device_tier, scene_spec(scene)
+    )
+
+
+def scene_render_budget(scene: bpy.types.Scene) -> dict:
+    return render_budget(scene.shopar_device_tier)
+
+
+def scene_spec(scene: bpy.types.Scene) -> Spec:
+    return load_spec(scene.shopar_category)
+
+
+def scene_rule_flags(scene: bpy.types.Scene) -> dict:
+    return {rule_id: getattr(scene.shopar_rules, rule_id) for rule_id in RULES}
+
+
+def check_model(context: bpy.types.Context, cache: dict | None = None):
+    return check_object(
+        context.active_object,
+        cache,
+        scene_budget(context.scene),
+        scene_render_budget(context.scene),
+        scene_rule_flags(context.scene),
+        spec=scene_spec(context.scene),
+    )
+
+
+def check_object(
+    obj: bpy.types.Object,
+    cache: dict | None = None,
+    budget: dict | None = None,
+    render_limits: dict | None = None,
+    rule_flags: dict | None = None,
+    threads: int = 1,
+    spec: Spec = SPEC,
+) -> Report:
+    warnings = []
     if obj.parent is not None:
         obj = utils.get_object_root(obj)
-        report["WARNING"].append(
-            f'Didn\'t select root node, running the check on the root parent "{obj.name[:20]}..."'
-        )
-
-    # TODO only for root
-    scale_output = check_scale(obj, [])
-    if len(scale_output) > 0:
-        for error in scale_output:
-            report["ERROR"].append(error)
-    else:
-        report["PASSED"].append(f"2.1 Scale of all nodes = 1")
-
-    # TODO only for root
-    location_output = check_location(obj, [])
-    if obj.location != Vector((0, 0, 0)) or len(location_output) > 0:
-        if obj.location != Vector((0, 0, 0)):
-            report["ERROR"].append(f"Root location {obj.location} not (0,0,0)")
-        if len(location_output) > 0:
-            for error in location_output:
-                report["ERROR"].append(error)
-    else:
-        report["PASSED"].append(
-            f"2.1/2.3 Origin of all nodes in (0,0,0), except temples"
+        warnings.append(
+            Finding(
+                "WARNING",
+                "root",
+                f'Didn\'t select root node, running the check on the root parent "{obj.name[:20]}..."',
+                obj.name,
+                fix="Select the root object of the model",
+            )
         )
 
-    # check naming and hierarchy
-    names_report = check_names(obj)
-    if len(names_report) == 0:
-        report["PASSED"].append("No invalid names, contains obligatory nodes")
-        report["PASSED"].append("Temples groups existing")
-    else:
-        for name in names_report:
-            report["ERROR"].append(name)
-
-    # only triangles and number of triangles
-    MAX_NUM_TRIANGLES = 100_000
-
-    num_triangles, num_ngons = check_faces(obj)
-    if num_triangles > MAX_NUM_TRIANGLES:
-        report["ERROR"].append(f"Number of triangles too big: {num_triangles}")
-    else:
-        report["PASSED"].append(
-            f"Number of triangles <{MAX_NUM_TRIANGLES}: {num_triangles}"
-        )
+    report = checks.check_model(
+        snapshot_object(obj), cache, budget, render_limits, rule_flags, threads, spec
+    )
+    report.findings[:0] = warnings
+    return report
 
-    if num_ngons > 0:
-        report["ERROR"].append(f"Number of ngons >0: {num_ngons}")
-    else:
-        report["PASSED"].append("All faces are triangles")
 
-    return report
+@functools.lru_cache(maxsize=None)
+def category_product_lines(category: str) -> list[tuple[str, str, str]]:
+    # Blender needs the strings of enum items kept alive, hence the cache
+    return [(line, line.capitalize(), "") for line in load_spec(category).budgets]
+
+
+def product_line_items(scene: bpy.types.Scene, context) -> list:
+    """Product lines of the spec of the scene's category."""
+    return category_product_lines(scene.shopar_category)
+
+
+def register():
+    global RuleFlags
+    # One enable flag per registered rule
+    RuleFlags = type(
+        "ShopAR_RuleFlags",
+        (bpy.types.PropertyGroup,),
+        {
+            "__annotations__": {
+                r.id: bpy.props.BoolProperty(
+                    name=r.title, description=r.description, default=r.enabled
+                )
+                for r in RULES.values()
+            }
+        },
+    )
+    bpy.utils.register_class(RuleFlags)
+    bpy.types.Scene.shopar_rules = bpy.props.PointerProperty(type=RuleFlags)
+    bpy.types.Scene.shopar_category = bpy.props.EnumProperty(
+        name="Category",
+        description="Product category whose spec the model follows",
+        items=[(category, category.capitalize(), "") for category in categories()],
+    )
+    bpy.types.Scene.shopar_product_line = bpy.props.EnumProperty(
+        name="Product line",
+        description="Product line the triangle budget is taken from",
+        items=product_line_items,
+    )
+    bpy.types.Scene.shopar_device_tier = bpy.props.EnumProperty(
+        name="Device tier",
+        description="Target device tier the triangle budget is taken from",
+        items=[(tier, tier.capitalize(), "") for tier in RENDER_BUDGETS],
+    )
+    for handlers, handler in HANDLERS:
+        if handler not in handlers:
+            handlers.append(handler)
+
+
+def unregister():
+    for handlers, handler in HANDLERS:
+        if handler in handlers:
+            handlers.remove(handler)
+    _generations.clear()
+    del bpy.types.Scene.shopar_rules
+    bpy.utils.unregister_class(RuleFlags)
+    del bpy.types.Scene.shopar_category
+    del bpy.types.Scene.shopar_product_line
+    del bpy.types.Scene.shopar_device_tier
@@ -0,0 +1,18 @@
+import pytest
+
+
+class AddonDirectory:
+    """Collects the add-on directory as a plain one.
+
+    Its __init__.py imports bpy, which a Package would import for setup.
+    """
+
+    @pytest.hookimpl(tryfirst=True)
+    def pytest_collect_directory(self, path, parent):
+        if path == parent.config.rootpath:
+            return pytest.Dir.from_parent(parent, path=path)
+        return None
+
+
+def pytest_configure(config):
+    config.pluginmanager.register(AddonDirectory())
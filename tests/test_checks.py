@@ -0,0 +1,96 @@
+import numpy as np
+
+from qa_core.checks import location_findings, mesh_face_counts, name_findings
+from qa_core.model import MeshData, ModelSnapshot
+from qa_core.spec import SPEC
+
+
+def make_snapshot(names: list[str], parents: list[int], meshes=None):
+    count = len(names)
+    return ModelSnapshot(
+        names,
+        ["EMPTY"] * count,
+        parents,
+        np.zeros((count, 3)),
+        np.ones((count, 3)),
+        np.tile(np.identity(4), (count, 1, 1)),
+        meshes if meshes is not None else [None] * count,
+    )
+
+
+def make_mesh(name: str, loop_totals: list[int]) -> MeshData:
+    loop_totals = np.array(loop_totals, dtype=np.int32)
+    loop_vertices = np.arange(loop_totals.sum(), dtype=np.int32)
+    vertices = np.zeros((len(loop_vertices), 3), dtype=np.float32)
+    return MeshData(name, vertices, loop_totals, loop_vertices)
+
+
+def test_suggest():
+    assert SPEC.suggest("fronnt_rim", "frame") == "front_rim"
+    assert SPEC.suggest("lens_lefft", "lenses") == "lens_left"
+    assert SPEC.suggest("xyz", "frame") is None
+
+
+def test_name_findings():
+    snapshot = make_snapshot(
+        ["Model", "frame", "fronnt_rim", "misc_logo", "lenses", "lens_left"],
+        [-1, 0, 1, 1, 0, 4],
+    )
+    findings = {node: (message, fix) for node, message, fix in name_findings(snapshot)}
+
+    message, fix = findings["fronnt_rim"]
+    assert 'did you mean "front_rim"?' in message
+    assert fix == 'Rename to "front_rim"'
+    # Parts may have misc_* siblings
+    assert "misc_logo" not in findings
+    for missing in ("front_rim", "lens_right", "temples", "temple_left_outer"):
+        assert findings[missing][0] == f"Missing node {missing}"
+    assert "frame" not in findings and "lens_left" not in findings
+
+
+def test_name_findings_skip_invalid_groups():
+    snapshot = make_snapshot(
+        ["Model", "frame", "templs", "temple_left"], [-1, 0, 0, 2]
+    )
+    findings = {node: message for node, message, _ in name_findings(snapshot)}
+
+    assert "Skipping the check of potential children" in findings["templs"]
+    # Children of an invalid group are not visited
+    assert findings["temple_left"] == "Missing node temple_left"
+
+
+def test_name_findings_without_suggestion():
+    snapshot = make_snapshot(["Model", "qwerty"], [-1, 0])
+    (node, message, fix), *_ = name_findings(snapshot)
+
+    assert node == "qwerty"
+    assert message.startswith('Invalid name: "qwerty"')
+    assert fix == "Rename to one of frame, lenses, temples"
+
+
+def test_mesh_face_counts():
+    quads = make_mesh("quads", [4, 4, 3])
+    triangles = make_mesh("triangles", [3, 3, 3, 5])
+    empty = make_mesh("empty", [])
+
+    counts = mesh_face_counts([quads, triangles, quads, empty])
+
+    assert counts[0].tolist() == [1, 3, 1, 0]
+    assert counts[1].tolist() == [2, 1, 2, 0]
+
+
+def test_mesh_face_counts_without_meshes():
+    triangles, ngons = mesh_face_counts([])
+
+    assert len(triangles) == 0 and len(ngons) == 0
+
+
+def test_location_findings_of_pivots():
+    snapshot = make_snapshot(
+        ["Model", "temples", "temple_left", "temple_right"], [-1, 0, 1, 1]
+    )
+    snapshot.locations[3] = (-0.07, 0, 0.01)
+
+    assert location_findings(snapshot) == [
+        (2, 'Pivot node "temple_left" location in world origin')
+    ]
@@ -0,0 +1,105 @@
+import json
+import struct
+
+import numpy as np
+import pytest
+
+from qa_core.gltf import load_gltf, parse_glb
+
+
+def glb(document: dict, binary: bytes) -> bytes:
+    data = json.dumps(document).encode()
+    data += b" " * (-len(data) % 4)
+    binary += b"\0" * (-len(binary) % 4)
+    length = 12 + 8 + len(data) + 8 + len(binary)
+    return (
+        struct.pack("<4sII", b"glTF", 2, length)
+        + struct.pack("<II", len(data), 0x4E4F534A)
+        + data
+        + struct.pack("<II", len(binary), 0x004E4942)
+        + binary
+    )
+
+
+@pytest.fixture
+def model_path(tmp_path):
+    # A quad of two indexed triangles with UVs and one triangle strip of four
+    # vertices, positions interleaved with padding
+    positions = np.array([[0, 0, 0], [1, 0, 0], [1, 1, 0], [0, 1, 0]], np.float32)
+    uv = np.array([[0, 0], [1, 0], [1, 1], [0, 1]], np.float32)
+    indices = np.array([0, 1, 2, 0, 2, 3], np.uint16)
+    padded = np.zeros((4, 4), np.float32)
+    padded[:, :3] = positions + [0, 0, 1]
+    views = [positions.tobytes(), uv.tobytes(), indices.tobytes(), padded.tobytes()]
+    offsets = np.cumsum([0] + [len(view) for view in views])
+    document = {
+        "asset": {"version": "2.0"},
+        "scene": 0,
+        "scenes": [{"nodes": [0]}],
+        "nodes": [
+            {"name": "Model", "children": [1, 2]},
+            {"name": "frame", "mesh": 0, "translation": [0, 2, 0]},
+            {"name": "strip", "mesh": 1, "scale": [1, 1, 3]},
+        ],
+        "meshes": [
+            {
+                "name": "quad",
+                "primitives": [
+                    {"attributes": {"POSITION": 0, "TEXCOORD_0": 1}, "indices": 2}
+                ],
+            },
+            {
+                "name": "strip",
+                "primitives": [{"attributes": {"POSITION": 3}, "mode": 5}],
+            },
+        ],
+        "accessors": [
+            {"bufferView": 0, "componentType": 5126, "count": 4, "type": "VEC3"},
+            {"bufferView": 1, "componentType": 5126, "count": 4, "type": "VEC2"},
+            {"bufferView": 2, "componentType": 5123, "count": 6, "type": "SCALAR"},
+            {"bufferView": 3, "componentType": 5126, "count": 4, "type": "VEC3"},
+        ],
+        "bufferViews": [
+            {"buffer": 0, "byteOffset": int(offset), "byteLength": len(view)}
+            for offset, view in zip(offsets, views)
+        ],
+        "buffers": [{"byteLength": int(offsets[-1])}],
+    }
+    document["bufferViews"][3]["byteStride"] = 16
+    path = tmp_path / "model.glb"
+    path.write_bytes(glb(document, b"".join(views)))
+    return path
+
+
+def test_parse_glb(model_path):
+    document, binary = parse_glb(model_path.read_bytes())
+
+    assert document["nodes"][0]["name"] == "Model"
+    assert len(binary) == document["buffers"][0]["byteLength"]
+
+
+def test_parse_glb_version():
+    with pytest.raises(ValueError, match="Unsupported GLB version 1"):
+        parse_glb(struct.pack("<4sII", b"glTF", 1, 12))
+
+
+def test_load_gltf(model_path):
+    snapshot = load_gltf(str(model_path))
+
+    assert snapshot.names == ["Model", "frame", "strip"]
+    assert snapshot.parents.tolist() == [-1, 0, 0]
+    assert snapshot.types == ["EMPTY", "MESH", "MESH"]
+    # glTF's Y up is Blender's Z up
+    np.testing.assert_allclose(snapshot.world_matrices()[1][:3, 3], [0, 0, 2])
+    np.testing.assert_allclose(snapshot.scales[2], [1, 3, 1])
+
+    quad, strip = snapshot.meshes[1:]
+    assert quad.num_polygons == 2 and quad.num_loops == 6
+    assert quad.loop_vertices.tolist() == [0, 1, 2, 0, 2, 3]
+    np.testing.assert_allclose(quad.vertices[2], [1, 0, 1])
+    np.testing.assert_allclose(quad.uv_layers["TEXCOORD_0"][1], [1, 1])
+    assert strip.uv_layer_names == []
+    # The second triangle of a strip is reversed
+    assert strip.loop_vertices.tolist() == [0, 1, 2, 2, 1, 3]
+    np.testing.assert_allclose(strip.vertices[:, 2], [0, 0, 1, 1])
+    np.testing.assert_allclose(strip.vertices[:, 1], -1)
@@ -0,0 +1,110 @@
+import numpy as np
+import pytest
+
+from qa_core.grid import PointGrid
+from qa_core.hygiene import MERGE_DISTANCE, duplicate_vertices
+from qa_core.model import MeshData
+from qa_core.symmetry import GridNeighbours
+
+
+def distances(queries: np.ndarray, points: np.ndarray) -> np.ndarray:
+    return np.linalg.norm(queries[:, None] - points[None], axis=2)
+
+
+def test_neighbour_pairs_contain_close_points():
+    rng = np.random.default_rng(0)
+    points = rng.random((500, 3))
+    queries = rng.random((200, 3)) * 1.2 - 0.1
+    grid = PointGrid(points, 0.1)
+
+    pairs = set()
+    for query_index, point_index in grid.neighbour_pairs(queries, clamp=True):
+        pairs.update(zip(query_index.tolist(), point_index.tolist()))
+
+    close = distances(queries, points) <= grid.block_distances(queries, True)[:, None]
+    assert set(zip(*np.nonzero(close))) <= pairs
+
+
+def test_neighbour_pairs_chunks(monkeypatch):
+    points = np.random.default_rng(1).random((300, 3))
+    grid = PointGrid(points, 0.5)
+    (whole,) = grid.neighbour_pairs(points)
+
+    monkeypatch.setattr("qa_core.grid.MAX_PAIRS", 64)
+    chunks = list(grid.neighbour_pairs(points))
+
+    assert len(chunks) > 1
+    for expected, parts in zip(whole, zip(*chunks)):
+        np.testing.assert_array_equal(np.concatenate(parts), expected)
+
+
+def test_nearest_candidates():
+    rng = np.random.default_rng(2)
+    points = rng.random((400, 3))
+    queries = rng.random((300, 3)) * 2 - 0.5
+    grid = PointGrid(points, 0.05)
+
+    nearest = grid.nearest_candidates(queries, clamp=True)
+    exact = distances(queries, points).min(axis=1)
+
+    found = nearest <= grid.block_distances(queries, clamp=True)
+    assert found.any()
+    np.testing.assert_allclose(nearest[found], exact[found])
+    assert np.all(nearest >= exact - 1e-12)
+
+
+@pytest.mark.parametrize("offset", [0.0, 0.002, 0.3])
+def test_grid_neighbours_max_distance(offset):
+    rng = np.random.default_rng(3)
+    points = rng.random((2000, 3)) * 0.1
+    queries = points[:1500] + rng.normal(0, offset, (1500, 3))
+
+    largest = GridNeighbours(points).max_distance(queries)
+
+    assert largest == pytest.approx(distances(queries, points).min(axis=1).max())
+
+
+def mesh_of(vertices: np.ndarray) -> MeshData:
+    empty = np.zeros(0, dtype=np.int32)
+    return MeshData("mesh", vertices, empty, empty)
+
+
+def test_duplicate_vertices():
+    rng = np.random.default_rng(4)
+    vertices = rng.random((1000, 3)) * 0.05
+    # Close copies of some vertices and a chain of three close vertices
+    copies = vertices[:40] + rng.uniform(-3e-5, 3e-5, (40, 3))
+    chain = np.array([[1, 1, 1], [1, 1, 1.00008], [1, 1, 1.00016]])
+    vertices = np.concatenate((vertices, copies, chain)).astype(np.float32)
+    mesh = mesh_of(vertices)
+
+    exact = vertices.astype(np.float64)
+    close = distances(exact, exact) <= MERGE_DISTANCE
+    expected = np.count_nonzero(np.tril(close, -1).any(axis=1))
+    assert duplicate_vertices(mesh) == expected
+    assert expected >= 42
+
+
+@pytest.mark.parametrize("offset", [0.0, 1e-4, 0.01])
+def test_grid_neighbours_bounded_max_distance(offset):
+    rng = np.random.default_rng(5)
+    points = rng.random((2000, 3)) * 0.1
+    queries = points + rng.normal(0, offset, points.shape)
+    limit = 2e-4
+
+    largest = GridNeighbours(points).max_distance(queries, limit)
+
+    exact = distances(queries, points).min(axis=1).max()
+    assert largest == (pytest.approx(exact) if exact <= limit else np.inf)
+
+
+def test_duplicate_vertices_of_a_cluster(monkeypatch):
+    rng = np.random.default_rng(6)
+    vertices = rng.random((300, 3)) * 2e-4
+    expected = duplicate_vertices(mesh_of(vertices))
+
+    monkeypatch.setattr("qa_core.hygiene.MAX_PAIRS", 100)
+    assert duplicate_vertices(mesh_of(vertices)) == expected
+
+    close = distances(vertices, vertices) <= MERGE_DISTANCE
+    assert expected == np.count_nonzero(np.tril(close, -1).any(axis=1))
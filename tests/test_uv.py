@@ -0,0 +1,60 @@
+import numpy as np
+
+from qa_core.model import MeshData
+from qa_core.uv import occupancy, uv_statistics
+
+SQUARE = np.array([[[0, 0], [1, 0], [1, 1]], [[0, 0], [1, 1], [0, 1]]], float)
+
+
+def cell_centers(size: int) -> np.ndarray:
+    y, x = np.divmod(np.arange(size * size), size)
+    return np.column_stack((x, y)) / size + 0.5 / size
+
+
+def test_occupancy_of_an_island():
+    counts = occupancy(SQUARE, 16)
+
+    # Centers on the shared diagonal belong to neither triangle
+    diagonal = np.arange(16) * 17
+    assert np.all(np.delete(counts, diagonal) == 1)
+    assert np.all(counts[diagonal] == 0)
+
+
+def test_occupancy_against_cell_centers():
+    rng = np.random.default_rng(0)
+    triangles = rng.random((50, 3, 2)) * 1.4 - 0.2
+    size = 32
+
+    counts = occupancy(triangles, size)
+
+    centers = cell_centers(size)
+    expected = np.zeros(size * size, dtype=np.int32)
+    for a, b, c in triangles:
+        sides = np.stack(
+            [
+                (end - start)[0] * (centers - start)[:, 1]
+                - (end - start)[1] * (centers - start)[:, 0]
+                for start, end in ((a, b), (b, c), (c, a))
+            ]
+        )
+        expected += np.all(sides > 0, axis=0) | np.all(sides < 0, axis=0)
+    # Centers within rounding of an edge may differ
+    assert np.count_nonzero(counts != expected) <= 2
+
+
+def test_uv_statistics():
+    vertices = np.array([[0, 0, 0], [1, 0, 0], [1, 1, 0], [0, 1, 0]], np.float32)
+    loop_totals = np.array([4], dtype=np.int32)
+    loop_vertices = np.arange(4, dtype=np.int32)
+    mesh = MeshData("quad", vertices, loop_totals, loop_vertices)
+
+    # The quad mapped onto the left half of the UV square
+    uv = np.array([[0, 0], [0.5, 0], [0.5, 1], [0, 1]], np.float64)
+    statistics = uv_statistics(mesh, uv)
+    assert abs(statistics["coverage"] - 0.5) < 0.01
+    assert statistics["overlap"] == 0
+    assert statistics["outside"] == 0
+    assert statistics["density_variation"] < 1e-9
+
+    uv[1:3, 0] = 1.5
+    assert uv_statistics(mesh, uv)["outside"] == 0.5